@@ -10,38 +10,289 @@ Este tipo de arquivo é utilizado nos modelos do setor elétrico brasileiro
 Autor   : Nelson Rossi Bittencourt
 Versão  : 0.111
 Licença : MIT
-Dependências: struct e openpyxl (se desejar ler dados do Excel).
-
-TODO: 
-
-    1) criar um método que lê o formato ONS e invoca-lo das demais rotinas.
-    2) criar rotinas para salvar MLTs e Postos?
+Dependências: struct, numpy e openpyxl (se desejar ler dados do Excel).
 
 ******************************************************************************
 """
 
-from openpyxl import load_workbook
+from collections.abc import Mapping
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
+import hashlib
+import json
+import os
+import pickle
 import struct
+import threading
+import time
+import tracemalloc
+import uuid
+import weakref
+import numpy as np
+
+# Tipo dos valores de vazão nos arquivos binários (inteiros de 32 bits, 'little endian').
+tipoVazao = np.dtype('<i4')
+
+# Números de postos utilizados pelo ONS nos horizontes de operação (320) e de planejamento (600).
+numPostosPadrao = (320, 600)
 
 # Classe que conterá um histórico de vazões.
 # anoInicial : deverá, obrigatoriamente, ser fornecido pelo usuário e corresponderá ao primeiro ano do histórico;
 # anoFinal : será calculado com base em anoInicial e no número de registros do arquivo;
 # numPostos : deverá ser fornecido pelo usuário;
-# valores : dicionário que conterá o número do posto como chave e um lista com todos os valores lidos.
+# dados : matriz contígua (numpy) com uma linha por mês do histórico e uma coluna por posto, tal como no arquivo binário;
+# valores : acesso por posto às colunas de 'dados'. valores[posto] retorna uma visão (sem cópia) com todos os valores 
+#   do posto, de modo que alterações feitas nela são refletidas no histórico. A atribuição de um dicionário 
+#   {posto;[vazões]} a 'valores' (forma antiga de criar um histórico) substitui 'dados' pelas vazões do dicionário;
+# postos e mlts : (opcionais) dados dos postos e MLTs associados ao histórico, nos formatos retornados por 'lePostos' 
+#   e 'leMLTS'. Podem ser compartilhados por vários históricos;
+# indiceNomes : índice {nome do posto; [números dos postos]} criado a partir de 'postos' na primeira consulta por nome 
+#   (ver 'consultaVazoes'). Se 'postos' for alterado, atribua None a 'indiceNomes' para que o índice seja recriado;
+# compartilhado : indica que 'dados' é compartilhado com outros históricos (ver 'leVazoesCache') e somente pode ser 
+#   lido. 'mudaVazao' e 'mudaVazoes' criam uma cópia própria de 'dados' antes da primeira alteração.
 class historicoVazoes:
-    def __init__(self):
-        self.anoInicial = 0
+    def __init__(self, anoInicial=0, numPostos=0, dados=None):
+        self.anoInicial = anoInicial
         self.anoFinal = 0
-        self.numPostos = 0
-        self.valores = {}
+        self.numPostos = numPostos
+        self.postos = None
+        self.mlts = None
+        self.indiceNomes = None
+        self.compartilhado = False
+        
+        if dados is None:
+            dados = np.zeros((0, numPostos), dtype=tipoVazao)
+        
+        self.dados = dados
+
+        if len(dados)>0:
+            self.anoFinal = int(anoInicial + len(dados)//12 - 1)
+
+    @property
+    def valores(self):
+        return vazoesPorPosto(self)
+
+    @valores.setter
+    def valores(self, valores):
+        if any(not (1 <= posto) for posto in valores):
+            raise NameError("Os postos devem ser maiores ou iguais a 1.")
+
+        # Os valores são copiados antes de substituir 'dados' (ex.: 'vazoesHist.valores = outroHist.valores').
+        numPostos = max([self.numPostos, *valores])
+        numMeses = max((len(v) for v in valores.values()), default=0)
+        dados = np.zeros((numMeses, numPostos), dtype=tipoVazao)
+        for posto, v in valores.items():
+            dados[:len(v), posto-1] = v
+
+        self.numPostos = numPostos
+        self.dados = dados
+        self.compartilhado = False
+        self.anoFinal = int(self.anoInicial + numMeses//12 - 1) if numMeses>=12 else 0
+
+# Classe que permite acessar as colunas de um 'historicoVazoes' como se fosse o antigo dicionário 
+# {posto;[vazões]}. As chaves são os números dos postos (1 a numPostos).
+class vazoesPorPosto(Mapping):
+    def __init__(self, vazoesHist):
+        self.vazoesHist = vazoesHist
+
+    def __getitem__(self, posto):
+        if not (1 <= posto <= self.vazoesHist.numPostos):
+            raise KeyError(posto)
+        return self.vazoesHist.dados[:, posto-1]
+
+    def __setitem__(self, posto, valores):
+        if not (1 <= posto <= self.vazoesHist.numPostos):
+            raise KeyError(posto)
+        valores = np.asarray(valores, dtype=tipoVazao)
+        preparaEscrita(self.vazoesHist)
+        ajustaDados(self.vazoesHist, len(valores))
+        self.vazoesHist.dados[:, posto-1] = 0
+        self.vazoesHist.dados[:len(valores), posto-1] = valores
+
+    def __iter__(self):
+        return iter(range(1, self.vazoesHist.numPostos+1))
+
+    def __len__(self):
+        return self.vazoesHist.numPostos
+
+def preparaEscrita(vazoesHist):
+    """
+    Garante que a matriz 'dados' de um objeto 'historicoVazoes' possa ser alterada. Se 'dados' for compartilhado 
+    com outros históricos (ver 'leVazoesCache'), o histórico passa a utilizar uma cópia própria.
+
+    Argumentos
+    ----------
+
+    vazoesHist : objeto do tipo 'historicoVazoes'.
+
+
+    Retorno
+    -------
+
+    Nenhum.
+
+    """
+    if vazoesHist.compartilhado:
+        vazoesHist.dados = vazoesHist.dados.copy()
+        vazoesHist.compartilhado = False
+
+def ajustaDados(vazoesHist, numMeses):
+    """
+    Garante que a matriz 'dados' de um objeto 'historicoVazoes' tenha, pelo menos, 'numMeses' linhas e 
+    'numPostos' colunas. Os valores incluídos são iguais a zero.
+
+    Argumentos
+    ----------
+
+    vazoesHist : objeto do tipo 'historicoVazoes';
+
+    numMeses : número mínimo de meses (linhas) do histórico.
+
+
+    Retorno
+    -------
+
+    Nenhum.
+
+    """
+    linhas, colunas = vazoesHist.dados.shape
+    
+    if linhas>=numMeses and colunas>=vazoesHist.numPostos:
+        return
+
+    novosDados = np.zeros((max(linhas, numMeses), max(colunas, vazoesHist.numPostos)), dtype=tipoVazao)
+    novosDados[:linhas, :colunas] = vazoesHist.dados
+    vazoesHist.dados = novosDados
+    vazoesHist.compartilhado = False
+    
+    if len(novosDados)>=12:
+        vazoesHist.anoFinal = int(vazoesHist.anoInicial + len(novosDados)//12 - 1)
+
+# Classe que conterá um bloco de vazões a alterar/inserir em um histórico (ver 'mudaVazoes').
+# postos : lista com os números dos postos (linhas do bloco);
+# meses e anos : listas com os meses e anos (colunas do bloco);
+# valores : matriz (postos x meses/anos) com as vazões.
+class blocoVazoes:
+    def __init__(self, postos=None, meses=None, anos=None, valores=None):
+        self.postos = [] if postos is None else postos
+        self.meses = [] if meses is None else meses
+        self.anos = [] if anos is None else anos
+        self.valores = [] if valores is None else valores
 
 class postoVazao:
+    __slots__ = ('nomePosto', 'anoInicial', 'anoFinal')
+
     def __init__(self):        
         self.nomePosto = ''
         self.anoInicial = 0
         self.anoFinal = 0
 
-def lerVazoesExcel(nomeArquivoExcel, linIni, colIni, linFim,colFim):
+# Classe que conterá os dados básicos de todos os postos de vazão, em vetores com um elemento por posto.
+# nomes : vetor (numpy) com os nomes dos postos;
+# anosIniciais e anosFinais : vetores (numpy) com os anos inicial e final de cada posto.
+# O acesso tabela[posto] é idêntico ao do antigo dicionário {número do posto; objeto 'postoVazao'}: retorna um 
+# objeto com os atributos 'nomePosto', 'anoInicial' e 'anoFinal', cujas alterações são refletidas nos vetores. 
+# A atribuição a um posto além do último estende os vetores.
+class tabelaPostos(Mapping):
+    def __init__(self, nomes=None, anosIniciais=None, anosFinais=None):
+        self.nomes = np.asarray([] if nomes is None else nomes, dtype='U12')
+        self.anosIniciais = np.asarray([] if anosIniciais is None else anosIniciais, dtype=np.int32)
+        self.anosFinais = np.asarray([] if anosFinais is None else anosFinais, dtype=np.int32)
+
+    def __getitem__(self, posto):
+        if not (1 <= posto <= len(self.nomes)):
+            raise KeyError(posto)
+        return registroPosto(self, posto-1)
+
+    def __setitem__(self, posto, dados):
+        if posto<1:
+            raise KeyError(posto)
+
+        # Como no antigo dicionário, novos postos podem ser incluídos. Os postos intermediários ficam vazios.
+        if posto>len(self.nomes):
+            if not self.nomes.flags.writeable:
+                raise ValueError("A tabela de postos é somente leitura.")
+            novos = posto - len(self.nomes)
+            self.nomes = np.concatenate((self.nomes, np.full(novos, '', dtype='U12')))
+            self.anosIniciais = np.concatenate((self.anosIniciais, np.zeros(novos, dtype=np.int32)))
+            self.anosFinais = np.concatenate((self.anosFinais, np.zeros(novos, dtype=np.int32)))
+
+        self.nomes[posto-1] = dados.nomePosto
+        self.anosIniciais[posto-1] = dados.anoInicial
+        self.anosFinais[posto-1] = dados.anoFinal
+
+    def __iter__(self):
+        return iter(range(1, len(self.nomes)+1))
+
+    def __len__(self):
+        return len(self.nomes)
+
+# Classe que permite acessar um posto de uma 'tabelaPostos' como se fosse um objeto 'postoVazao'.
+class registroPosto:
+    __slots__ = ('tabela', 'indice')
+
+    def __init__(self, tabela, indice):
+        self.tabela = tabela
+        self.indice = indice
+
+    @property
+    def nomePosto(self):
+        return str(self.tabela.nomes[self.indice])
+
+    @nomePosto.setter
+    def nomePosto(self, valor):
+        self.tabela.nomes[self.indice] = valor
+
+    @property
+    def anoInicial(self):
+        return int(self.tabela.anosIniciais[self.indice])
+
+    @anoInicial.setter
+    def anoInicial(self, valor):
+        self.tabela.anosIniciais[self.indice] = valor
+
+    @property
+    def anoFinal(self):
+        return int(self.tabela.anosFinais[self.indice])
+
+    @anoFinal.setter
+    def anoFinal(self, valor):
+        self.tabela.anosFinais[self.indice] = valor
+
+# Classe que conterá as MLTs mensais de todos os postos.
+# valores : matriz (numpy) com uma linha por mês e uma coluna por posto, tal como no arquivo binário.
+# O acesso tabela[posto] é idêntico ao do antigo dicionário {posto;[mlt jan, mlt fev, ... mlt dez]}: retorna uma 
+# visão (sem cópia) das MLTs do posto. A atribuição a um posto além do último estende a matriz.
+class tabelaMLTS(Mapping):
+    def __init__(self, valores=None):
+        self.valores = np.zeros((12, 0), dtype=tipoVazao) if valores is None else valores
+
+    def __getitem__(self, posto):
+        if not (1 <= posto <= self.valores.shape[1]):
+            raise KeyError(posto)
+        return self.valores[:, posto-1]
+
+    def __setitem__(self, posto, valores):
+        if posto<1:
+            raise KeyError(posto)
+
+        # Como no antigo dicionário, novos postos podem ser incluídos. Os postos intermediários têm MLTs iguais a zero.
+        if posto>self.valores.shape[1]:
+            if not self.valores.flags.writeable:
+                raise ValueError("A tabela de MLTs é somente leitura.")
+            novos = np.zeros((12, posto - self.valores.shape[1]), dtype=self.valores.dtype)
+            self.valores = np.concatenate((self.valores, novos), axis=1)
+
+        self.valores[:, posto-1] = valores
+
+    def __iter__(self):
+        return iter(range(1, self.valores.shape[1]+1))
+
+    def __len__(self):
+        return self.valores.shape[1]
+
+def lerVazoesExcel(nomeArquivoExcel, linIni, colIni, linFim,colFim, formato='dicionario'):
     """
     Lê valores de vazão de uma planilha Excel (xlsx) para atualizar um arquivo binário de vazões.
     A plalinha deverá conter:
@@ -67,18 +318,34 @@ def lerVazoesExcel(nomeArquivoExcel, linIni, colIni, linFim,colFim):
 
     colIni e colFim : Colunas inicial e final do intervalo de dados a ser lido do Excel;
 
+    formato : (Opcional) formato do retorno. Default: 'dicionario'.
+        Existem dois formatos possíveis:
+
+            'dicionario' - dicionário descrito abaixo e
+
+            'bloco' - objeto do tipo 'blocoVazoes' (postos x meses/anos).
+
 
     Retorno
     -------
 
     Dicionário contendo como chave o número do posto e como valor uma lista com sub-listas na forma
-    [mes ano valor].
+    [mes ano valor] ou objeto 'blocoVazoes', conforme o argumento 'formato'. Ambos podem ser utilizados 
+    diretamente por 'mudaVazoes'.
 
     """
-    outPut = {}                         # Dicionário de saída
-    meses = []                          # Lista de meses (lidos da coluna de cabeçalho do Excel)
-    anos = []                           # Lista de anos (lidos da coluna de cabeçalho do Excel)
-    numCols = colFim - colIni           # Número de colunas do intervalo
+    if formato not in ('dicionario', 'bloco'):
+        raise NameError("Formato inválido!\nUtilize 'dicionario' ou 'bloco'.")
+
+    # O 'openpyxl' somente é importado quando necessário, pois sua importação é lenta e o pacote é opcional.
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise NameError("O pacote 'openpyxl' é necessário para ler dados do Excel.")
+
+    desempenho = registroAtivo.get()
+    if desempenho is not None:
+        marca = desempenho.inicia()
 
     # Abre o arquivo Excel especificado, como somente leitura e obtendo apenas valores.
     wb = load_workbook(filename=nomeArquivoExcel, read_only=True, data_only=True)
@@ -86,26 +353,35 @@ def lerVazoesExcel(nomeArquivoExcel, linIni, colIni, linFim,colFim):
     # Seleciona a aba de dados (Worksheet) 'Dados'.
     ws = wb['Dados']
 
+    # Percorre o intervalo uma única vez, linha a linha.
+    linhas = ws.iter_rows(min_row=linIni, max_row=linFim, min_col=colIni, max_col=colFim, values_only=True)
+
     # Lê cabelahaço com os meses e anos.
-    for coluna in range(colIni+1,colFim+1):
-        data = ws.cell(linIni, coluna).value
-        meses.append(data.month)
-        anos.append(data.year)
-
-    # Lê os dados e aloca na variável de saída.
-    for linha in range(linIni+1,linFim+1):
-        posto = ws.cell(linha,colIni).value            
-        listaDados = []
-        
-        for coluna in range(0, numCols):
-            valor = int(ws.cell(linha,coluna+colIni+1).value)                
-            listaDados.append([meses[coluna], anos[coluna], valor])
-        
-        outPut[posto] = listaDados           
+    cabecalho = next(linhas)
+    meses = [data.month for data in cabecalho[1:]]
+    anos = [data.year for data in cabecalho[1:]]
+
+    # Lê os postos (primeira coluna) e os dados.
+    postos = []
+    valores = []
+    for linha in linhas:
+        postos.append(linha[0])
+        valores.append([int(valor) for valor in linha[1:]])
     
     # Fecha o Excel.
     wb.close()
 
+    if desempenho is not None:
+        desempenho.registra('lerVazoesExcel', 'leitura', marca, numRegistros=len(postos))
+
+    if (formato=='bloco'):
+        return blocoVazoes(postos, meses, anos, np.array(valores, dtype=np.int64).reshape(len(postos), len(meses)))
+
+    # Dicionário de saída.
+    outPut = {}
+    for posto, valoresPosto in zip(postos, valores):
+        outPut[posto] = [[mes, ano, valor] for mes, ano, valor in zip(meses, anos, valoresPosto)]
+
     return outPut
 
 def lePostos(nomeArquivo):
@@ -116,6 +392,57 @@ def lePostos(nomeArquivo):
     Argumentos
     ----------
 
+    nomeArquivo : nome do arquivo binario de postos no formato do ONS.
+    
+    Retorno
+    -------
+
+    Objeto 'tabelaPostos', que pode ser utilizado como um dicionário no formato {número do posto; objeto 'postoVazao'}.
+    
+    """
+    # Formato dos registros do arquivo ("=12sii"): nome do posto, ano inicial e ano final.
+    formatoDados = np.dtype([('nome', 'S12'), ('anoInicial', '<i4'), ('anoFinal', '<i4')])
+
+    desempenho = registroAtivo.get()
+    if desempenho is not None:
+        marca = desempenho.inicia()
+
+    # Lê todos os registros de uma só vez.
+    try:        
+        registros = np.fromfile(nomeArquivo, dtype=np.uint8)
+    except:
+        raise NameError("Erro ao abrir arquivo binário de postos: {}.".format(nomeArquivo))
+
+    if desempenho is not None:
+        desempenho.registra('lePostos', 'leitura', marca, numBytes=registros.size)
+        marca = desempenho.inicia()
+
+    if (registros.size % formatoDados.itemsize != 0):
+        raise NameError("Arquivo binário de postos com tamanho inválido: {}.".format(nomeArquivo))
+
+    registros = registros.view(formatoDados)
+
+    # Converte os nomes ('latin1') para texto: cada byte corresponde ao mesmo código Unicode.
+    caracteres = np.ascontiguousarray(registros['nome']).view(np.uint8).reshape(-1, 12)
+    nomes = np.char.strip(caracteres.astype('<u4').view('<U12')[:, 0])
+
+    postos = tabelaPostos(nomes, registros['anoInicial'], registros['anoFinal'])
+
+    if desempenho is not None:
+        desempenho.registra('lePostos', 'decodificacao', marca, numRegistros=len(postos))
+
+    return postos
+
+# Função descontinuada.
+# A versão que lê todos os registros de uma só vez, em vetores, é mais eficiente.
+def lePostos_Old(nomeArquivo):
+    """
+    Lê os dados básicos dos postos de vazão (nome, ano inicial e ano final) de um arquivo binário no 
+    formato ONS.
+    
+    Argumentos
+    ----------
+
     nomeArquivo : nome do arquivo binario de MLTs no formato do ONS.
     
     Retorno
@@ -210,35 +537,83 @@ def leMLTS(nomeArquivo, numPostos=320):
     Retorno
     -------
 
-    Dicionário no formato {posto;[mlt jan, mlt fev, ... mlt dez]}.
+    Objeto 'tabelaMLTS', que pode ser utilizado como um dicionário no formato {posto;[mlt jan, mlt fev, ... mlt dez]}.
     
     """
-    # Cria novo dicionário para conter os pares ordenados (posto;mlt).
-    mlts = {}
+    desempenho = registroAtivo.get()
+    if desempenho is not None:
+        marca = desempenho.inicia()
 
-    for i in range(1,numPostos+1):        
-        mlts[i] = []
+    # Lê todo o arquivo de uma só vez, com um registro (mês) por linha e um posto por coluna.
+    try:        
+        mlts = np.fromfile(nomeArquivo, dtype=tipoVazao)
+    except:
+        raise NameError("Erro ao abrir arquivo binário de MLTS: {}.".format(nomeArquivo))
 
-    # Contador de postos.
-    posto = 1
+    if (mlts.size % numPostos != 0):
+        raise NameError("Arquivo binário de MLTS incompatível com {} postos: {}.".format(numPostos, nomeArquivo))
 
-    # Prepara função para ler estrutura de dados do arquivo.
-    formatoDados = str(int(numPostos)) + "i"                    # Formato dos dados no arquivo        
-    tamFormato = struct.calcsize(formatoDados)                  # Tamanho esperado dos dados
-    structUnpack = struct.Struct(formatoDados).unpack_from      # Função para extrair os dados
+    if desempenho is not None:
+        desempenho.registra('leMLTS', 'leitura', marca, numBytes=mlts.nbytes, numRegistros=mlts.size // numPostos)
 
-    # Abre o arquivo binário de MLTs e aloca seus dados no dicionário correspondente.
-    try:        
-        with open(nomeArquivo, 'rb') as f:
-           while (data:=f.read(tamFormato)):                                                                
-                s = structUnpack(data)
-                for i in range(1,numPostos+1):
-                    mlts[i].append(s[i-1])
-                                 
+    return tabelaMLTS(mlts.reshape(-1, numPostos))
+
+def detectaNumPostos(nomeArquivo, arquivoPostos=None):
+    """
+    Determina o número de postos de um arquivo binário de vazões.
+
+    Argumentos
+    ----------
+
+    nomeArquivo : nome do arquivo binário de vazões no formato CEPEL/ONS;
+
+    arquivoPostos : (Opcional) nome do arquivo binário de postos ('postos.dat') correspondente. Se fornecido, 
+        o número de postos será o número de registros deste arquivo. Caso contrário, o número de postos será 
+        determinado pelo tamanho do arquivo de vazões, que deve conter um número inteiro de anos para apenas 
+        um dos valores padrão do ONS (320 ou 600 postos).
+
+
+    Retorno
+    -------
+
+    Número de postos (inteiro).
+
+    """
+    if arquivoPostos is not None:
+        return len(lePostos(arquivoPostos))
+
+    try:
+        tamanho = os.path.getsize(nomeArquivo)
     except:
-        raise NameError("Erro ao abrir arquivo binário de MLTS: {}.".format(nomeArquivo))
+        raise NameError("Erro ao abrir arquivo binário de vazões:{}.".format(nomeArquivo))
+
+    # Tamanho de um ano (12 registros) para cada número de postos padrão.
+    candidatos = [n for n in numPostosPadrao if tamanho>0 and tamanho % (12 * n * tipoVazao.itemsize) == 0]
+
+    if len(candidatos)!=1:
+        raise NameError("Não foi possível determinar o número de postos do arquivo {}.\n"
+                        "Informe 'numPostos' ou 'arquivoPostos'.".format(nomeArquivo))
+
+    return candidatos[0]
+
+def verificaNumPostos(numValores, numPostos, nomeArquivo):
+    """
+    Verifica se um arquivo binário de vazões com 'numValores' valores é compatível com 'numPostos'. Gera erro se 
+    o arquivo não contiver um número inteiro de registros ou se não contiver um número inteiro de anos para 
+    'numPostos', mas contiver para outro número de postos padrão do ONS (ex.: arquivo de 600 postos lido com o 
+    valor padrão de 320 postos, cujos registros ficariam desalinhados). Função auxiliar de 'leVazoes', 
+    'abrirVazoes', 'anexaVazoes', 'empilhaVazoes', 'comparaVazoes' e 'leVazoesAsync'.
+    """
+    if (numValores % numPostos != 0):
+        raise NameError("Arquivo binário de vazões incompatível com {} postos:{}.".format(numPostos, nomeArquivo))
+
+    if (numValores % (12 * numPostos) != 0):
+        outros = [n for n in numPostosPadrao if n!=numPostos and numValores>0 and numValores % (12 * n) == 0]
+        if outros:
+            raise NameError("O arquivo binário de vazões {} não contém um número inteiro de anos para {} postos, "
+                            "mas contém para {} postos.\nInforme 'numPostos' ou 'arquivoPostos'.".format(
+                            nomeArquivo, numPostos, outros[0]))
 
-    return(mlts)
 
 # Função descontinuada.
 # A função que utiliza dados estruturadas é muito mais eficiente.
@@ -276,8 +651,9 @@ def leVazoes_Old(nomeArquivo, anoInicial=1931, numPostos=320):
     localVazoesLidas.numPostos = numPostos
 
     # Cria listas vazias para conter as vazões.
+    valores = {}
     for i in range(1,numPostos+1):        
-        localVazoesLidas.valores[i] = []
+        valores[i] = []
     
     # Abre o arquivo binário e aloca seus dados nas listas correspondentes.
     try:        
@@ -285,13 +661,17 @@ def leVazoes_Old(nomeArquivo, anoInicial=1931, numPostos=320):
             while (byte1:=f.read(4)):                                
                 numRegistros = numRegistros + 1
                 tmp = int.from_bytes(byte1,'little')                
-                localVazoesLidas.valores[posto].append(tmp)
+                valores[posto].append(tmp)
                 posto = posto + 1
                 if (posto==(numPostos+1)): 
                     posto = 1             
     except:
         raise NameError("Erro ao abrir arquivo binário de vazões:{}.".format(nomeArquivo))
 
+    # Transfere as listas para o objeto tipo 'historicoVazoes'.
+    for i in range(1,numPostos+1):
+        localVazoesLidas.valores[i] = valores[i]
+
     # Calcula o ano final do arquivo e atribui ao objeto tipo 'historicoVazoes'.
     anoFinal = int((anoInicial + (numRegistros/(12*numPostos)))-1)
     localVazoesLidas.anoFinal = anoFinal
@@ -299,7 +679,7 @@ def leVazoes_Old(nomeArquivo, anoInicial=1931, numPostos=320):
     return localVazoesLidas
 
 
-def leVazoes(nomeArquivo, anoInicial=1931, numPostos=320):
+def leVazoes(nomeArquivo, anoInicial=1931, numPostos=320, arquivoPostos=None):
     """
     Lê todas as vazões de um arquivo binário.
 
@@ -312,6 +692,10 @@ def leVazoes(nomeArquivo, anoInicial=1931, numPostos=320):
 
     numeroPostos : (Opcional) número de postos contidos no histórico de vazões. Default: 320.
         O ONS utiliza 320 postos para o horizonte de operação e 600 postos para o horizonte de planejamento.
+        Se None, o número de postos será determinado automaticamente (ver 'detectaNumPostos').
+
+    arquivoPostos : (Opcional) nome do arquivo binário de postos ('postos.dat') correspondente. Se fornecido, 
+        o número de postos será obtido deste arquivo e os dados dos postos serão atribuídos a 'historicoVazoes.postos'.
 
     
     Retorno
@@ -321,142 +705,147 @@ def leVazoes(nomeArquivo, anoInicial=1931, numPostos=320):
 
     """
 
-    # Contador do número de registros.
-    numRegistros = 0        
-
-    # Índice do posto.
-    posto = 1
-
-    # Cria uma instância da classe 'historicoVazoes' e atribui valores iniciais.
-    localVazoesLidas = historicoVazoes()    
-    localVazoesLidas.anoInicial = anoInicial
-    localVazoesLidas.numPostos = numPostos
+    # Determina o número de postos (e, portanto, o tamanho de cada registro) quando solicitado.
+    postos = None
+    if arquivoPostos is not None:
+        postos = lePostos(arquivoPostos)
+        numPostos = len(postos)
+    elif numPostos is None:
+        numPostos = detectaNumPostos(nomeArquivo)
 
-    # Cria listas vazias para conter as vazões.
-    for i in range(1,numPostos+1):        
-        localVazoesLidas.valores[i] = []
-    
-    formatoDados = "=320i"                                     # Formato dos dados no arquivo
-    tamFormato = struct.calcsize(formatoDados)                  # Tamanho esperado dos dados
-    structUnpack = struct.Struct(formatoDados).unpack_from      # Função para extrair os dados
+    desempenho = registroAtivo.get()
+    if desempenho is not None:
+        marca = desempenho.inicia()
 
-    # Abre o arquivo binário e aloca seus dados nas listas correspondentes.
+    # Lê todo o arquivo de uma só vez para um vetor de inteiros de 32 bits.
     try:        
-        with open(nomeArquivo, 'rb') as f:
-             while (data:=f.read(tamFormato)):                                                                
-                s = structUnpack(data)
-                numRegistros = numRegistros + 1
-                for i in range(1,numPostos+1):
-                    localVazoesLidas.valores[i].append(s[i-1])
-                
+        dados = np.fromfile(nomeArquivo, dtype=tipoVazao)
     except:
         raise NameError("Erro ao abrir arquivo binário de vazões:{}.".format(nomeArquivo))
 
-    # Calcula o ano final do arquivo e atribui ao objeto tipo 'historicoVazoes'.
-    anoFinal = int((anoInicial + (numRegistros/12))-1)
-    localVazoesLidas.anoFinal = anoFinal
+    # Cada registro do arquivo corresponde a um mês e contém um valor por posto.
+    verificaNumPostos(dados.size, numPostos, nomeArquivo)
+
+    if desempenho is not None:
+        desempenho.registra('leVazoes', 'leitura', marca, numBytes=dados.nbytes, numRegistros=dados.size // numPostos)
+
+    # Reorganiza o vetor em uma matriz (meses x postos), sem cópia dos dados, e cria o objeto 'historicoVazoes'.
+    # O ano final é calculado com base no ano inicial e no número de registros.
+    localVazoesLidas = historicoVazoes(anoInicial, numPostos, dados.reshape(-1, numPostos))
+    localVazoesLidas.postos = postos
     
     return localVazoesLidas
 
 
-def salvaArquivo(nomeArquivo,vazoesHist, tipoArquivo='binario'):
+def abrirVazoes(nomeArquivo, modo='mmap', anoInicial=1931, numPostos=320, arquivoPostos=None):
     """
-    Salva os dados binários de vazão no arquivo especificado, utilizando um dos formatos válidos.
+    Abre um arquivo binário de vazões sem carregá-lo para a memória (mapeamento em memória). 
+    Os valores de um posto/mês somente são lidos do disco quando acessados e as páginas do arquivo 
+    são compartilhadas entre processos que abrem o mesmo arquivo.
 
     Argumentos
     ----------
-    
-    nomeArquivo : nome do arquivo a salvar;
 
-    vazoesHist: objeto do tipo 'historicoVazoes' com os dados a serem salvos;
+    nomeArquivo : nome do arquivo binário de vazões no formato CEPEL/ONS;
 
-    tipoArquivo : (Opcional) especifica o tipo de arquivo a salvar. Default:'binario'
-         Existem três tipos possíveis:
+    modo : (Opcional) forma de acesso ao arquivo. Default: 'mmap'.
+        Existem quatro modos possíveis:
 
-            'binário' - arquivo de vazões binário no formato dos modelos do setor elétrico;
+            'mmap' - alterações feitas com 'mudaVazao' são escritas diretamente no arquivo;
 
-            'csv' - arquivo separado por vírgulas para uso no Excel e
+            'copia' - alterações ficam apenas na memória do processo ('copy-on-write'), sem alterar o arquivo;
 
-            'vazEdit' - formato idêntico ao produzido pelo aplicativo 'VazEdit' do ONS.
+            'leitura' - somente leitura. Qualquer tentativa de alteração gerará erro;
+
+            'memoria' - lê todo o arquivo para a memória (idêntico a 'leVazoes').
+
+    anoInicial : (Opcional) ano inicial do histórico de vazões. Default: 1931.
+
+    numeroPostos : (Opcional) número de postos contidos no histórico de vazões. Default: 320.
+        O ONS utiliza 320 postos para o horizonte de operação e 600 postos para o horizonte de planejamento.
+        Se None, o número de postos será determinado automaticamente (ver 'detectaNumPostos').
+
+    arquivoPostos : (Opcional) nome do arquivo binário de postos ('postos.dat') correspondente. Se fornecido, 
+        o número de postos será obtido deste arquivo e os dados dos postos serão atribuídos a 'historicoVazoes.postos'.
 
 
     Retorno
     -------
 
-    Nenhum.
+    Objeto tipo 'historicoVazoes' cuja matriz 'dados' é mapeada no arquivo.
+    
+    Observações: no modo 'mmap', utilize 'vazoesHist.dados.flush()' para garantir que as alterações foram escritas 
+    no disco. A inclusão de novos anos no horizonte (ver 'mudaVazao') transfere o histórico para a memória e, a partir 
+    daí, as alterações somente serão gravadas com 'salvaArquivo'.
 
-    """        
+    """
+    
+    # Modos de abertura e os respectivos modos do 'numpy.memmap'.
+    modos = {'mmap':'r+', 'copia':'c', 'leitura':'r'}
 
-    # Número de registros para cada posto de vazão.
-    nr = len(vazoesHist.valores[1])
+    if (modo=='memoria'):
+        return leVazoes(nomeArquivo, anoInicial, numPostos, arquivoPostos)
+    
+    if modo not in modos:
+        raise NameError("Modo de abertura inválido!\nUtilize 'mmap', 'copia', 'leitura' ou 'memoria'.")
+
+    # Determina o número de postos (e, portanto, o tamanho de cada registro) quando solicitado.
+    postos = None
+    if arquivoPostos is not None:
+        postos = lePostos(arquivoPostos)
+        numPostos = len(postos)
+    elif numPostos is None:
+        numPostos = detectaNumPostos(nomeArquivo)
+
+    desempenho = registroAtivo.get()
+    if desempenho is not None:
+        marca = desempenho.inicia()
+
+    # Mapeia o arquivo em memória. Nenhum valor é lido neste momento.
+    try:
+        dados = np.memmap(nomeArquivo, dtype=tipoVazao, mode=modos[modo])
+    except:
+        raise NameError("Erro ao abrir arquivo binário de vazões:{}.".format(nomeArquivo))
 
-    if (tipoArquivo=='binario'):
-        #  Tenta salvar as vazões em um arquivo binário.
-        try:        
-            with open(nomeArquivo, 'wb') as f:
-                for n1 in range(0,nr):
-                    for posto in range(1,vazoesHist.numPostos+1):
-                        f.write(vazoesHist.valores[posto][n1].to_bytes(4,'little'))               
-                
-        except:
-            raise NameError("Erro ao tentar salvar o arquivo binário: {}".format(nomeArquivo))
+    # Cada registro do arquivo corresponde a um mês e contém um valor por posto.
+    verificaNumPostos(dados.size, numPostos, nomeArquivo)
 
+    vazoesHist = historicoVazoes(anoInicial, numPostos, dados.reshape(-1, numPostos))
+    vazoesHist.postos = postos
 
-    # Tenta salvar as vazões em um arquivo 'vazEdit' ou 'csv'
-    elif (tipoArquivo=='vazEdit' or tipoArquivo=='csv'):
-        try:
-            # Determina o separador (sep) e o número mínimo de caracteres de cada campo (adj).
-            # Como são três campos a salvar(número do posto, ano e vazões), adj deve ter 3 valores.
-            if (tipoArquivo == 'csv'):
-                sep = ','               # Se desejar, pode alterar sep de ',' para ';'
-                adj = [0,0,0]           # No formato csv, não existe a necessidade de strings com tamanho mínimo
-            else:
-                sep = ''
-                adj = [3,6,5]           # No formato 'vazEdit', estes são os valores para manter a compatibilidade
-
-            with open(nomeArquivo, 'w') as f:
-                for posto in range(1,vazoesHist.numPostos+1):               # Loop para o número de postos
-                    ano = vazoesHist.anoInicial                     
-                    sPosto = str(posto).rjust(adj[0])
-                    if (sum(vazoesHist.valores[posto])>0):                  # Somente salva postos com valor
-                        for n1 in range(0,nr,12):                           # Loop para o número de registros, com passo de 12 meses
-                            sVazoes = ''
-                            valores = vazoesHist.valores[posto][n1:n1+12]
-                            for m in range(0,12):                           # Loop para 12 meses
-                                sVazoes = sVazoes + str(valores[m]).zfill(2).rjust(adj[1]) + sep
-                        
-                            sAno = str(ano).rjust(adj[2])
-                            saida = sPosto + sep +  sAno + sep + sVazoes
-                            f.write(saida+'\n')               
-                            ano = ano + 1
-                
-        except:
-    
-            raise NameError("Erro ao salvar arquivo do tipo {} : {}".format(tipoArquivo, nomeArquivo))
-    else:
-        raise NameError("Tipo de arquivo a salvar inválido!\nUtilize 'binario', 'vazEdit' ou 'csv'.")
+    if desempenho is not None:
+        desempenho.registra('abrirVazoes', 'mapeamento', marca, numRegistros=len(vazoesHist.dados))
 
+    return vazoesHist
 
-def mudaVazao(vazoesHist, posto, mes, ano, novaVazao):
+
+def anexaVazoes(nomeArquivo, ano, mes, valoresPorPosto, anoInicial=1931, numPostos=320, arquivoPostos=None):
     """
-    Altera/inclui valores de/em um objeto 'historicoVazoes' para posterior uso/salvamento.
-    
-    Caso o ano especificado não faça parte do horizonte, serão incluídos vetores com valor zero
-    de modo a manter o arquivo compatível.
-    
+    Altera/inclui valores diretamente em um arquivo binário de vazões, sem lê-lo ou reescrevê-lo por completo. 
+    Apenas os registros (meses) afetados são lidos e escritos.
+
+    Caso o ano especificado não faça parte do horizonte, o arquivo será estendido com registros de valor zero 
+    até completar o último ano, tal como em 'mudaVazao'.
+
     Argumentos
     ----------
 
-    vazoesHist : histórico de vazões previamente lido/criado/alterado. Deve ser um objeto tipo 'historicoVazoes';
+    nomeArquivo : nome do arquivo binário de vazões no formato CEPEL/ONS;
 
-    posto : número do posto de vazão a processar a alteração/inclusão. Deve ser um número inteiro e respeitar o número
-        máximo de postos do arquivo;
+    ano : ano do primeiro valor a alterar/inserir. Inteiro;
 
-    mes : número do mês a alterar/inserir. Inteiro;
+    mes : mês do primeiro valor a alterar/inserir. Inteiro;
 
-    ano : número do mês a alterar/inserir. Inteiro;
+    valoresPorPosto : dicionário no formato {posto;valor} ou {posto;[valor mes, valor mes+1, ...]}. 
+        Listas alteram/incluem meses consecutivos a partir de mes/ano. Os demais postos não são alterados;
 
-    novaVazao : valor da vazão a alterar/inserir. Valores não inteiros serão convertidos automaticamente.
+    anoInicial : (Opcional) ano inicial do histórico de vazões. Default: 1931.
+
+    numeroPostos : (Opcional) número de postos contidos no histórico de vazões. Default: 320.
+        Se None, o número de postos será determinado automaticamente (ver 'detectaNumPostos').
+
+    arquivoPostos : (Opcional) nome do arquivo binário de postos ('postos.dat') correspondente. Se fornecido, 
+        o número de postos será obtido deste arquivo.
 
 
     Retorno
@@ -466,34 +855,2299 @@ def mudaVazao(vazoesHist, posto, mes, ano, novaVazao):
 
     """
 
+    # Determina o número de postos (e, portanto, o tamanho de cada registro) quando solicitado.
+    if arquivoPostos is not None or numPostos is None:
+        numPostos = detectaNumPostos(nomeArquivo, arquivoPostos)
+
     # Erro se o ano inicial for inferior ao mínimo do histórico.
-    if ano<vazoesHist.anoInicial:
-        raise NameError("Você não pode alterar vazões de anos anteriores a {}.".format(vazoesHist.anoInicial))
+    if ano<anoInicial:
+        raise NameError("Você não pode alterar vazões de anos anteriores a {}.".format(anoInicial))
+
+    if not (1 <= mes <= 12):
+        raise NameError("Os meses devem estar entre 1 e 12.")
+
+    if any(not (1 <= posto <= numPostos) for posto in valoresPorPosto):
+        raise NameError("Os postos devem estar entre 1 e {}.".format(numPostos))
+
+    # Valores a escrever, por posto, como vetores de inteiros (um valor por mês).
+    novosValores = {posto: np.trunc(np.atleast_1d(np.asarray(v, dtype=np.float64))).astype(tipoVazao) 
+                    for posto, v in valoresPorPosto.items()}
+    numMeses = max((len(v) for v in novosValores.values()), default=0)
+    if numMeses==0:
+        return
+
+    tamRegistro = numPostos * tipoVazao.itemsize
+
+    desempenho = registroAtivo.get()
+    if desempenho is not None:
+        marca = desempenho.inicia()
+
+    # Registro (mês) inicial e final (exclusivo) das alterações.
+    pos = (mes-1)+(ano-anoInicial)*12
+    ultimo = pos + numMeses
+
+    try:
+        with open(nomeArquivo, 'r+b') as f:
+            tamanho = f.seek(0, os.SEEK_END)
+            if (tamanho % tamRegistro != 0):
+                raise NameError("Arquivo binário de vazões incompatível com {} postos:{}.".format(numPostos, nomeArquivo))
+            verificaNumPostos(tamanho // tipoVazao.itemsize, numPostos, nomeArquivo)
+            numRegistros = tamanho // tamRegistro
+
+            # Como em 'mudaVazao', o arquivo é estendido com anos completos de valores iguais a zero.
+            if ultimo>numRegistros:
+                fim = -(-ultimo // 12) * 12
+            else:
+                fim = ultimo
+            
+            # Bloco de registros a reescrever: os registros alterados e, se for o caso, os registros incluídos.
+            inicio = min(pos, numRegistros)
+            bloco = np.zeros((fim - inicio, numPostos), dtype=tipoVazao)
+            existentes = min(fim, numRegistros) - inicio
+            if existentes>0:
+                f.seek(inicio * tamRegistro)
+                f.readinto(memoryview(bloco[:existentes]).cast('B'))
+
+            for posto, v in novosValores.items():
+                bloco[pos-inicio:pos-inicio+len(v), posto-1] = v
+
+            f.seek(inicio * tamRegistro)
+            bloco.tofile(f)
+    except NameError:
+        raise
+    except:
+        raise NameError("Erro ao alterar arquivo binário de vazões:{}.".format(nomeArquivo))
 
-    # Converte o valor da vazão para inteiro.
-    novaVazaoI = int(novaVazao)
+    if desempenho is not None:
+        desempenho.registra('anexaVazoes', 'escrita', marca, numBytes=bloco.nbytes, numRegistros=len(bloco))
 
-    # Posição do arquivo a escrever o(s) valor(es).
-    pos = (mes-1)+(ano-vazoesHist.anoInicial)*12
 
-    # Altera um valor de vazão já existente no histórico.
-    if ano>=vazoesHist.anoInicial and ano<=vazoesHist.anoFinal:
-        if ((mes-1) in range(0,12)):            
-            vazoesHist.valores[posto][pos] = novaVazaoI
-            
-    # Insere novos anos no histórico.
-    if ano>vazoesHist.anoFinal:        
-        anosInserir = int(ano - vazoesHist.anoFinal)                    # número de anos a inserir
-        valoresAno = [0] * (12 * anosInserir)                           # vetor de 12 meses x número de anos a inserir
-        vazoesHist.anoFinal = vazoesHist.anoFinal + anosInserir         # altera o ano final do histórico
-        
-        for p in range(1,vazoesHist.numPostos+1):
-                vazoesHist.valores[p].extend(valoresAno)                
-        vazoesHist.valores[posto][pos] = novaVazaoI
+def leVariosVazoes(listaArquivos, numPostos=320, workers=None, anoInicial=1931, arquivoPostos=None, 
+                   arquivoMLTS=None, empilhar=False):
+    """
+    Lê vários arquivos binários de vazões (ex.: cenários) simultaneamente, utilizando várias 'threads'.
+    
+    Os dados dos postos e as MLTs, se fornecidos, são lidos uma única vez e compartilhados por todos os históricos.
+
+    Argumentos
+    ----------
+
+    listaArquivos : lista com os nomes dos arquivos binários de vazões no formato CEPEL/ONS;
 
+    numeroPostos : (Opcional) número de postos contidos nos históricos de vazões. Default: 320.
+        Se None, o número de postos será determinado automaticamente (ver 'detectaNumPostos').
 
+    workers : (Opcional) número máximo de arquivos lidos simultaneamente. Default: None (número de processadores).
 
+    anoInicial : (Opcional) ano inicial dos históricos de vazões. Default: 1931.
+
+    arquivoPostos : (Opcional) nome do arquivo binário de postos ('postos.dat'). Se fornecido, o número de postos 
+        será obtido deste arquivo e os dados dos postos serão atribuídos a 'historicoVazoes.postos'.
+
+    arquivoMLTS : (Opcional) nome do arquivo binário de MLTs ('mlt.dat'). Se fornecido, as MLTs serão atribuídas 
+        a 'historicoVazoes.mlts'.
+
+    empilhar : (Opcional) se True, retorna uma única matriz (cenários x meses x postos). Neste caso, todos os 
+        arquivos devem ter o mesmo tamanho, 'anoInicial' não é utilizado (a matriz não contém os anos) e 
+        'arquivoPostos' e 'arquivoMLTS' não podem ser fornecidos. Default: False.
+
+    
+    Retorno
+    -------
+
+    Lista de objetos tipo 'historicoVazoes', na mesma ordem de 'listaArquivos', ou matriz (cenários x meses x postos).
+
+    """
+
+    # A matriz empilhada não possui onde guardar os dados dos postos e as MLTs.
+    if empilhar and (arquivoPostos is not None or arquivoMLTS is not None):
+        raise NameError("'arquivoPostos' e 'arquivoMLTS' não podem ser utilizados com 'empilhar=True'.")
+
+    # Dados compartilhados por todos os históricos.
+    postos = None
+    mlts = None
+    if arquivoPostos is not None:
+        postos = lePostos(arquivoPostos)
+        numPostos = len(postos)
+    elif numPostos is None and len(listaArquivos)>0:
+        numPostos = detectaNumPostos(listaArquivos[0])
+    
+    if arquivoMLTS is not None:
+        mlts = leMLTS(arquivoMLTS, numPostos)
+
+    if empilhar:
+        return empilhaVazoes(listaArquivos, numPostos, workers)
+
+    def leArquivo(nomeArquivo):
+        vazoesHist = leVazoes(nomeArquivo, anoInicial, numPostos)
+        vazoesHist.postos = postos
+        vazoesHist.mlts = mlts
+        return vazoesHist
+
+    # Cada leitura é executada em uma cópia do contexto atual (ver 'registroDesempenho').
+    contextos = [contextvars.copy_context() for _ in listaArquivos]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(lambda contexto, nomeArquivo: contexto.run(leArquivo, nomeArquivo), 
+                                 contextos, listaArquivos))
+
+def empilhaVazoes(listaArquivos, numPostos, workers=None):
+    """
+    Lê vários arquivos binários de vazões de mesmo tamanho diretamente para uma única matriz 
+    (cenários x meses x postos). Função auxiliar de 'leVariosVazoes'.
+
+    Argumentos
+    ----------
+
+    listaArquivos : lista com os nomes dos arquivos binários de vazões no formato CEPEL/ONS;
+
+    numeroPostos : número de postos contidos nos históricos de vazões;
+
+    workers : (Opcional) número máximo de arquivos lidos simultaneamente. Default: None (número de processadores).
 
     
-   
-   
\ No newline at end of file
+    Retorno
+    -------
+
+    Matriz (cenários x meses x postos).
+
+    """
+    try:
+        tamanhos = [os.path.getsize(nomeArquivo) for nomeArquivo in listaArquivos]
+    except OSError as erro:
+        raise NameError("Erro ao abrir arquivo binário de vazões:{}.".format(erro.filename))
+
+    tamRegistro = numPostos * tipoVazao.itemsize
+    if len(set(tamanhos))>1 or (tamanhos and tamanhos[0] % tamRegistro != 0):
+        raise NameError("Os arquivos a empilhar devem ter o mesmo tamanho e conter registros de {} postos.".format(numPostos))
+    if tamanhos:
+        verificaNumPostos(tamanhos[0] // tipoVazao.itemsize, numPostos, listaArquivos[0])
+
+    numMeses = tamanhos[0] // tamRegistro if tamanhos else 0
+    dados = np.empty((len(listaArquivos), numMeses, numPostos), dtype=tipoVazao)
+
+    # Cada arquivo é lido diretamente para a sua posição na matriz, sem cópias intermediárias.
+    def leArquivo(i):
+        try:
+            with open(listaArquivos[i], 'rb') as f:
+                f.readinto(memoryview(dados[i]).cast('B'))
+        except:
+            raise NameError("Erro ao abrir arquivo binário de vazões:{}.".format(listaArquivos[i]))
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(leArquivo, range(len(listaArquivos))))
+
+    return dados
+
+
+def leVazoesTexto(nomeArquivo, tipo='vazEdit', anoInicial=None, numPostos=320, sep=','):
+    """
+    Lê todas as vazões de um arquivo texto nos formatos produzidos por 'salvaArquivo' ('vazEdit' ou 'csv').
+    
+    Cada linha do arquivo contém o número do posto, o ano e as 12 vazões mensais do ano. Postos sem linhas no
+    arquivo terão todas as vazões iguais a zero.
+
+    Argumentos
+    ----------
+
+    nomeArquivo : nome do arquivo texto de vazões;
+
+    tipo : (Opcional) formato do arquivo. Default: 'vazEdit'.
+         Existem dois tipos possíveis:
+
+            'vazEdit' - formato de largura fixa idêntico ao produzido pelo aplicativo 'VazEdit' do ONS e
+
+            'csv' - arquivo separado por vírgulas (ou pelo separador 'sep').
+
+    anoInicial : (Opcional) ano inicial do histórico de vazões. Default: None (menor ano encontrado no arquivo).
+
+    numeroPostos : (Opcional) número de postos contidos no histórico de vazões. Default: 320.
+        Se None, será utilizado o menor número de postos padrão do ONS (320 ou 600) que contenha todos os 
+        postos do arquivo.
+
+    sep : (Opcional) separador dos campos no formato 'csv'. Default: ','.
+
+    
+    Retorno
+    -------
+
+    Objeto tipo 'historicoVazoes'.
+
+    """
+
+    if tipo not in ('vazEdit', 'csv'):
+        raise NameError("Tipo de arquivo a ler inválido!\nUtilize 'vazEdit' ou 'csv'.")
+
+    desempenho = registroAtivo.get()
+    if desempenho is not None:
+        marca = desempenho.inicia()
+
+    # Lê o arquivo e converte suas linhas em uma tabela com 14 colunas (posto, ano e 12 vazões mensais).
+    # No formato 'csv', a leitura e a conversão são feitas pelo 'numpy' e registradas como uma única fase.
+    try:
+        if (tipo=='csv'):
+            tabela = np.loadtxt(nomeArquivo, dtype=np.int64, delimiter=sep, usecols=range(14), ndmin=2)
+            numBytes = os.path.getsize(nomeArquivo)
+        else:
+            with open(nomeArquivo, 'rb') as f:
+                texto = f.read()
+            numBytes = len(texto)
+            if desempenho is not None:
+                desempenho.registra('leVazoesTexto', 'leitura', marca, numBytes=numBytes)
+                marca = desempenho.inicia()
+            tabela = leTabelaVazEdit(texto)
+    except ValueError as erro:
+        raise NameError("Erro ao ler arquivo do tipo {} : {}\n{}".format(tipo, nomeArquivo, erro))
+    except:
+        raise NameError("Erro ao ler arquivo do tipo {} : {}".format(tipo, nomeArquivo))
+
+    if desempenho is not None:
+        desempenho.registra('leVazoesTexto', 'decodificacao', marca, numBytes=numBytes if tipo=='csv' else 0, 
+                          numRegistros=len(tabela))
+        marca = desempenho.inicia()
+
+    postos = tabela[:, 0]
+    anos = tabela[:, 1]
+    
+    if len(tabela)==0:
+        raise NameError("Arquivo do tipo {} sem dados : {}".format(tipo, nomeArquivo))
+
+    if anoInicial is None:
+        anoInicial = int(anos.min())
+
+    if numPostos is None:
+        numPostos = next((n for n in numPostosPadrao if n>=postos.max()), int(postos.max()))
+    
+    if postos.min()<1 or postos.max()>numPostos or anos.min()<anoInicial:
+        raise NameError("Postos ou anos fora do intervalo esperado no arquivo do tipo {} : {}".format(tipo, nomeArquivo))
+
+    # Distribui as linhas na matriz (anos x meses x postos) do histórico.
+    numAnos = int(anos.max()) - anoInicial + 1
+    dados = np.zeros((numAnos, 12, numPostos), dtype=tipoVazao)
+    dados[anos-anoInicial, :, postos-1] = tabela[:, 2:]
+
+    if desempenho is not None:
+        desempenho.registra('leVazoesTexto', 'montagem', marca, numRegistros=len(tabela))
+
+    return historicoVazoes(anoInicial, numPostos, dados.reshape(-1, numPostos))
+
+def leTabelaVazEdit(texto):
+    """
+    Converte o conteúdo de um arquivo no formato 'vazEdit' em uma tabela de inteiros. Função auxiliar de 'leVazoesTexto'.
+
+    Os campos têm largura fixa (posto: 3, ano: 5 e vazões: 6 caracteres) e são convertidos de uma só vez, 
+    dígito a dígito, sobre a matriz de caracteres de todas as linhas.
+
+    Argumentos
+    ----------
+
+    texto : conteúdo (bytes) do arquivo.
+
+    
+    Retorno
+    -------
+
+    Matriz (numpy) com uma linha por linha do arquivo e 14 colunas (posto, ano e 12 vazões mensais).
+
+    """
+    # Largura e nome dos campos e largura das linhas.
+    larguras = [3, 5] + [6] * 12
+    campos = ['posto', 'ano'] + ['vazão do mês {}'.format(mes) for mes in range(1, 13)]
+    largura = sum(larguras)
+
+    # Matriz de caracteres (linhas x colunas). Os números das linhas no arquivo são mantidos para as mensagens de erro.
+    numLinhas, linhas = [], []
+    for n, l in enumerate(texto.splitlines(), 1):
+        if l.strip():
+            numLinhas.append(n)
+            linhas.append(l)
+
+    for n, l in zip(numLinhas, linhas):
+        if len(l)!=largura:
+            raise ValueError(mensagemLarguraVazEdit(n, l, larguras, campos))
+    caracteres = np.frombuffer(b''.join(linhas), dtype=np.uint8).reshape(-1, largura)
+
+    # Somente dígitos, espaços e o sinal negativo são aceitos.
+    ehDigito = (caracteres>=ord('0')) & (caracteres<=ord('9'))
+    ehNegativo = caracteres==ord('-')
+    ehBranco = caracteres==ord(' ')
+    if not np.all(ehDigito | ehNegativo | ehBranco):
+        raise ValueError("Caracteres inválidos.")
+
+    # Em cada campo, os espaços devem anteceder o valor e o sinal negativo deve anteceder os dígitos 
+    # (ex.: ' 1 2' e '1-2' são inválidos).
+    inicio = 0
+    for w, campo in zip(larguras, campos):
+        iniciado = np.logical_or.accumulate(~ehBranco[:, inicio:inicio+w], axis=1)
+        invalidos = (ehBranco[:, inicio+1:inicio+w] & iniciado[:, :-1]).any(axis=1)
+        invalidos |= (ehNegativo[:, inicio+1:inicio+w] & iniciado[:, :-1]).any(axis=1)
+        invalidos |= ehNegativo[:, inicio+w-1]
+        if invalidos.any():
+            raise ValueError("Linha {}: valor inválido no campo {}.".format(numLinhas[np.flatnonzero(invalidos)[0]], campo))
+        inicio = inicio + w
+
+    digitos = ((caracteres - ord('0')) * ehDigito).astype(np.float64)
+
+    # Os campos estão alinhados à direita. Assim, cada dígito é multiplicado pela potência de 10 da sua posição 
+    # no campo, o que é feito para todos os campos com um único produto matricial (exato em ponto flutuante).
+    pesos = np.zeros((largura, len(larguras)))
+    negativos = np.zeros((largura, len(larguras)))
+    inicio = 0
+    for i, w in enumerate(larguras):
+        pesos[inicio:inicio+w, i] = 10.0 ** np.arange(w-1, -1, -1)
+        negativos[inicio:inicio+w, i] = 1
+        inicio = inicio + w
+    
+    tabela = np.rint(digitos @ pesos).astype(np.int64)
+    if ehNegativo.any():
+        tabela[(ehNegativo @ negativos)>0] *= -1
+
+    return tabela
+
+def mensagemLarguraVazEdit(numLinha, linha, larguras, campos):
+    """
+    Retorna a mensagem de erro para uma linha do formato 'vazEdit' com tamanho diferente do esperado, indicando, 
+    quando possível, o primeiro campo mais largo que o permitido (ex.: vazões a partir de 1000000, que 'salvaArquivo' 
+    escreve sem truncar). Função auxiliar de 'leTabelaVazEdit'.
+    """
+    mensagem = "Linha {}: {} caracteres, mas o formato 'vazEdit' tem {} (posto: 3, ano: 5 e vazões: 6 caracteres).".format(
+               numLinha, len(linha), sum(larguras))
+
+    # Valores mais largos que o campo não são separados do valor anterior por espaços.
+    for valor, w, campo in zip(linha.split(), larguras, campos):
+        if len(valor)>w:
+            mensagem = mensagem + " O campo {} (ou o seguinte) excede a largura permitida.".format(campo)
+            break
+
+    return mensagem
+
+
+def salvaArquivo(nomeArquivo,vazoesHist, tipoArquivo='binario', atomico=False):
+    """
+    Salva os dados binários de vazão no arquivo especificado, utilizando um dos formatos válidos.
+
+    Argumentos
+    ----------
+    
+    nomeArquivo : nome do arquivo a salvar;
+
+    vazoesHist: objeto do tipo 'historicoVazoes' com os dados a serem salvos;
+
+    tipoArquivo : (Opcional) especifica o tipo de arquivo a salvar. Default:'binario'
+         Existem quatro tipos possíveis:
+
+            'binário' - arquivo de vazões binário no formato dos modelos do setor elétrico;
+
+            'csv' - arquivo separado por vírgulas para uso no Excel;
+
+            'vazEdit' - formato idêntico ao produzido pelo aplicativo 'VazEdit' do ONS e
+
+            'npz' - arquivo compactado do numpy, com as vazões de cada posto armazenadas separadamente 
+                    (ver 'leVazoesNpz'). Inclui os dados dos postos e as MLTs, se atribuídos a 'vazoesHist'.
+
+    atomico : (Opcional) se True, os dados são escritos em um arquivo temporário no mesmo diretório, que substitui 
+        'nomeArquivo' somente após a escrita completa. Assim, outros processos nunca encontram um arquivo 
+        parcialmente escrito. Default: False.
+        Se 'vazoesHist' estiver mapeado no próprio arquivo a salvar (ver 'abrirVazoes'), o modo atômico será 
+        utilizado automaticamente, após a transferência do histórico para a memória. No modo 'mmap', as vazões 
+        binárias já estão no arquivo e apenas são gravadas no disco ('vazoesHist.dados.flush()').
+
+
+    Retorno
+    -------
+
+    Nenhum.
+
+    """        
+
+    if tipoArquivo not in ('binario', 'vazEdit', 'csv', 'npz'):
+        raise NameError("Tipo de arquivo a salvar inválido!\nUtilize 'binario', 'vazEdit', 'csv' ou 'npz'.")
+
+    # Número de registros para cada posto de vazão.
+    nr = len(vazoesHist.dados)
+
+    # Não é possível reescrever diretamente o arquivo do qual os dados estão mapeados.
+    if mapeadoEm(vazoesHist, nomeArquivo):
+        # No modo 'mmap', as vazões binárias já estão no próprio arquivo.
+        if tipoArquivo=='binario' and vazoesHist.dados.mode=='r+':
+            vazoesHist.dados.flush()
+            return
+
+        # O Windows não permite substituir um arquivo mapeado: o histórico é transferido para a memória e o 
+        # mapeamento é liberado antes da substituição.
+        vazoesHist.dados = np.array(vazoesHist.dados)
+        atomico = True
+
+    # Arquivo efetivamente escrito (temporário, no modo atômico).
+    if atomico:
+        arquivoSaida = "{}.{}.tmp".format(nomeArquivo, uuid.uuid4().hex[:8])
+    else:
+        arquivoSaida = nomeArquivo
+
+    try:
+        escreveArquivo(arquivoSaida, vazoesHist, tipoArquivo, nr)
+        if atomico:
+            substituiArquivo(arquivoSaida, nomeArquivo)
+    except:
+        if atomico and os.path.exists(arquivoSaida):
+            os.remove(arquivoSaida)
+        raise NameError("Erro ao salvar arquivo do tipo {} : {}".format(tipoArquivo, nomeArquivo))
+
+
+def mapeadoEm(vazoesHist, nomeArquivo):
+    """
+    Retorna True se a matriz 'dados' de 'vazoesHist' estiver mapeada no arquivo 'nomeArquivo' (ver 'abrirVazoes'). 
+    Função auxiliar de 'salvaArquivo' e 'salvaArquivoAsync'.
+    """
+    arquivoMapeado = getattr(vazoesHist.dados, 'filename', None)
+    return bool(arquivoMapeado) and os.path.exists(nomeArquivo) and os.path.samefile(arquivoMapeado, nomeArquivo)
+
+def substituiArquivo(temporario, nomeArquivo):
+    """
+    Substitui 'nomeArquivo' pelo arquivo 'temporario' (modo atômico de 'salvaArquivo'). Os dados do arquivo 
+    temporário são gravados no disco ('fsync') antes da substituição e, onde possível, o diretório é gravado após 
+    a substituição. Assim, mesmo após uma falha do sistema, 'nomeArquivo' contém os dados antigos ou os novos, 
+    nunca um arquivo vazio ou incompleto. Função auxiliar de 'salvaArquivo' e 'salvaArquivoAsync'.
+    """
+    with open(temporario, 'r+b') as f:
+        f.flush()
+        os.fsync(f.fileno())
+
+    os.replace(temporario, nomeArquivo)
+
+    # O diretório somente pode ser aberto (e gravado) em sistemas POSIX.
+    if hasattr(os, 'O_DIRECTORY'):
+        descritor = os.open(os.path.dirname(os.path.abspath(nomeArquivo)), os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(descritor)
+        finally:
+            os.close(descritor)
+
+def escreveArquivo(nomeArquivo, vazoesHist, tipoArquivo, nr):
+    """
+    Escreve os dados de vazão no arquivo especificado. Função auxiliar de 'salvaArquivo'.
+
+    Argumentos
+    ----------
+    
+    nomeArquivo : nome do arquivo a escrever;
+
+    vazoesHist: objeto do tipo 'historicoVazoes' com os dados a serem salvos;
+
+    tipoArquivo : 'binario', 'vazEdit', 'csv' ou 'npz';
+
+    nr : número de registros (meses) a escrever.
+
+
+    Retorno
+    -------
+
+    Nenhum.
+
+    """        
+
+    # Fases registradas em 'salvaArquivo': formatação dos dados e escrita do arquivo.
+    desempenho = registroAtivo.get()
+    if desempenho is not None:
+        marca = desempenho.inicia()
+
+    if (tipoArquivo=='binario'):
+        # Converte todo o histórico (meses x postos) para o formato do arquivo e escreve de uma só vez.
+        dados = np.ascontiguousarray(vazoesHist.dados[:nr, :vazoesHist.numPostos], dtype=tipoVazao)
+        if desempenho is not None:
+            desempenho.registra('salvaArquivo', 'formatacao', marca, numRegistros=nr)
+            marca = desempenho.inicia()
+        with open(nomeArquivo, 'wb') as f:
+            dados.tofile(f)
+        numBytes = dados.nbytes
+
+    # Salva as vazões em um arquivo compactado do numpy, com um vetor por posto.
+    elif (tipoArquivo=='npz'):
+        vetores = {'anoInicial': np.array(vazoesHist.anoInicial), 'numPostos': np.array(vazoesHist.numPostos), 
+                   'numMeses': np.array(nr)}
+        
+        for posto in range(1, vazoesHist.numPostos+1):
+            vetores[nomeVetorPosto(posto)] = vazoesHist.dados[:nr, posto-1]
+
+        if vazoesHist.postos is not None:
+            postos = range(1, vazoesHist.numPostos+1)
+            vazio = postoVazao()
+            vetores['nomesPostos'] = np.array([vazoesHist.postos.get(p, vazio).nomePosto for p in postos])
+            vetores['anosIniciaisPostos'] = np.array([vazoesHist.postos.get(p, vazio).anoInicial for p in postos])
+            vetores['anosFinaisPostos'] = np.array([vazoesHist.postos.get(p, vazio).anoFinal for p in postos])
+
+        if vazoesHist.mlts is not None:
+            vetores['mlts'] = np.array([vazoesHist.mlts.get(p, [0]*12) for p in range(1, vazoesHist.numPostos+1)]).T
+
+        if desempenho is not None:
+            desempenho.registra('salvaArquivo', 'formatacao', marca, numRegistros=nr)
+            marca = desempenho.inicia()
+
+        # A compactação é feita durante a escrita.
+        with open(nomeArquivo, 'wb') as f:
+            np.savez_compressed(f, **vetores)
+            numBytes = f.tell()
+
+
+    # Salva as vazões em um arquivo 'vazEdit' ou 'csv'
+    elif (tipoArquivo=='vazEdit' or tipoArquivo=='csv'):
+        # Determina o separador (sep) e o número mínimo de caracteres de cada campo (adj).
+        # Como são três campos a salvar(número do posto, ano e vazões), adj deve ter 3 valores.
+        if (tipoArquivo == 'csv'):
+            sep = ','               # Se desejar, pode alterar sep de ',' para ';'
+            adj = [0,0,0]           # No formato csv, não existe a necessidade de strings com tamanho mínimo
+        else:
+            sep = ''
+            adj = [3,6,5]           # No formato 'vazEdit', estes são os valores para manter a compatibilidade
+
+        # Todo o arquivo é formatado em memória e escrito de uma só vez.
+        texto = formataTexto(vazoesHist, nr, sep, adj)
+        if desempenho is not None:
+            desempenho.registra('salvaArquivo', 'formatacao', marca, numRegistros=nr)
+            marca = desempenho.inicia()
+        with open(nomeArquivo, 'w') as f:
+            f.write(texto)
+        numBytes = len(texto)
+
+    if desempenho is not None:
+        desempenho.registra('salvaArquivo', 'escrita', marca, numBytes=numBytes, numRegistros=nr)
+
+
+def formataTexto(vazoesHist, nr, sep, adj, postos=None):
+    """
+    Formata as vazões de um histórico nos formatos texto ('vazEdit' ou 'csv'). Função auxiliar de 'escreveArquivo'.
+
+    Cada linha contém o número do posto, o ano e as 12 vazões do ano, todos seguidos do separador 'sep'. 
+    As vazões têm, pelo menos, dois dígitos (ex.: '05'). Somente são salvos os postos cuja soma das vazões é 
+    positiva. As linhas são geradas por um único modelo de formatação aplicado a todo o histórico.
+
+    Argumentos
+    ----------
+
+    vazoesHist: objeto do tipo 'historicoVazoes' com os dados a serem salvos;
+
+    nr : número de registros (meses) a formatar. Deve corresponder a anos completos;
+
+    sep : separador dos campos;
+
+    adj : número mínimo de caracteres dos campos posto, vazões e ano;
+
+    postos : (Opcional) vetor com os números dos postos a formatar, em ordem crescente. Permite formatar o arquivo 
+        em partes (ver 'postosComValores'). Default: None (todos os postos com valor).
+
+
+    Retorno
+    -------
+
+    String com o conteúdo do arquivo (ou da parte correspondente a 'postos').
+
+    """
+    if (nr % 12 != 0):
+        raise ValueError("O histórico deve conter anos completos.")
+
+    numAnos = nr // 12
+    dados = vazoesHist.dados[:nr, :vazoesHist.numPostos]
+
+    # Somente salva postos com valor.
+    if postos is None:
+        postos = postosComValores(dados)
+
+    # Tabela com uma linha por posto/ano: posto, ano e 12 vazões mensais.
+    tabela = np.empty((len(postos), numAnos, 14), dtype=np.int64)
+    tabela[:, :, 0] = postos[:, np.newaxis]
+    tabela[:, :, 1] = np.arange(vazoesHist.anoInicial, vazoesHist.anoInicial + numAnos)
+    tabela[:, :, 2:] = dados[:, postos-1].T.reshape(len(postos), numAnos, 12)
+    tabela = tabela.reshape(-1, 14)
+
+    # Modelo de cada linha. A precisão '.2' equivale a 'zfill(2)' para valores não negativos.
+    modeloLinha = "%{}d{}%{}d{}".format(adj[0] or '', sep, adj[2] or '', sep) + ("%{}.2d{}".format(adj[1] or '', sep) * 12) + "\n"
+    
+    # Valores entre -9 e -1 são formatados com 'zfill(2)' (ex.: '-5', e não '-05').
+    especiais = ((tabela[:, 2:] < 0) & (tabela[:, 2:] > -10)).any(axis=1)
+    
+    if not especiais.any():
+        return (modeloLinha * len(tabela)) % tuple(tabela.ravel().tolist())
+
+    linhas = []
+    for linha, especial in zip(tabela.tolist(), especiais):
+        if especial:
+            sVazoes = ''.join(str(v).zfill(2).rjust(adj[1]) + sep for v in linha[2:])
+            linhas.append(str(linha[0]).rjust(adj[0]) + sep + str(linha[1]).rjust(adj[2]) + sep + sVazoes + "\n")
+        else:
+            linhas.append(modeloLinha % tuple(linha))
+
+    return ''.join(linhas)
+
+
+def postosComValores(dados):
+    """
+    Retorna o vetor com os números dos postos cuja soma das vazões é positiva (postos salvos nos formatos texto). 
+    Função auxiliar de 'formataTexto'.
+    """
+    return np.flatnonzero(dados.sum(axis=0, dtype=np.int64) > 0) + 1
+
+def nomeVetorPosto(posto):
+    """
+    Retorna o nome do vetor com as vazões de um posto nos arquivos do tipo 'npz' (ex.: 'posto001').
+    """
+    return 'posto{:03d}'.format(posto)
+
+def leVazoesNpz(nomeArquivo, postos=None, anoInicial=None, anoFinal=None):
+    """
+    Lê as vazões de um arquivo do tipo 'npz' salvo por 'salvaArquivo'. Apenas os postos solicitados são 
+    descompactados.
+
+    Argumentos
+    ----------
+
+    nomeArquivo : nome do arquivo do tipo 'npz';
+
+    postos : (Opcional) lista com os números dos postos a ler. Os demais postos terão vazões iguais a zero.
+        Default: None (todos os postos).
+
+    anoInicial : (Opcional) primeiro ano a ler. Default: None (ano inicial do arquivo).
+
+    anoFinal : (Opcional) último ano a ler. Default: None (ano final do arquivo).
+
+
+    Retorno
+    -------
+
+    Objeto tipo 'historicoVazoes'. Se o arquivo contiver os dados dos postos e as MLTs, estes serão atribuídos 
+    a 'historicoVazoes.postos' e 'historicoVazoes.mlts'.
+
+    """
+    desempenho = registroAtivo.get()
+    if desempenho is not None:
+        marca = desempenho.inicia()
+
+    try:
+        arquivo = np.load(nomeArquivo, allow_pickle=False)
+    except:
+        raise NameError("Erro ao abrir arquivo do tipo npz : {}".format(nomeArquivo))
+
+    with arquivo:
+        anoInicialArquivo = int(arquivo['anoInicial'])
+        numPostos = int(arquivo['numPostos'])
+        
+        if postos is None:
+            postos = range(1, numPostos+1)
+
+        if any(not (1 <= posto <= numPostos) for posto in postos):
+            raise NameError("Os postos devem estar entre 1 e {}.".format(numPostos))
+
+        numMeses = int(arquivo['numMeses'])
+        anoFinalArquivo = anoInicialArquivo + numMeses//12 - 1
+
+        if anoInicial is None:
+            anoInicial = anoInicialArquivo
+        if anoFinal is None:
+            anoFinal = anoFinalArquivo
+
+        if anoInicial<anoInicialArquivo or anoFinal>anoFinalArquivo or anoInicial>anoFinal:
+            raise NameError("Período inválido. Utilize anos entre {} e {}.".format(anoInicialArquivo, anoFinalArquivo))
+
+        # Meses do período solicitado.
+        inicio = (anoInicial - anoInicialArquivo) * 12
+        fim = (anoFinal - anoInicialArquivo + 1) * 12
+
+        dados = np.zeros((fim - inicio, numPostos), dtype=tipoVazao)
+        for posto in postos:
+            dados[:, posto-1] = arquivo[nomeVetorPosto(posto)][inicio:fim]
+
+        vazoesHist = historicoVazoes(anoInicial, numPostos, dados)
+
+        if 'nomesPostos' in arquivo.files:
+            vazoesHist.postos = tabelaPostos(arquivo['nomesPostos'], arquivo['anosIniciaisPostos'], arquivo['anosFinaisPostos'])
+
+        if 'mlts' in arquivo.files:
+            vazoesHist.mlts = tabelaMLTS(arquivo['mlts'].astype(tipoVazao))
+
+    if desempenho is not None:
+        desempenho.registra('leVazoesNpz', 'leitura', marca, numBytes=dados.nbytes, numRegistros=len(dados))
+
+    return vazoesHist
+
+
+def mudaVazao(vazoesHist, posto, mes, ano, novaVazao):
+    """
+    Altera/inclui valores de/em um objeto 'historicoVazoes' para posterior uso/salvamento.
+    
+    Caso o ano especificado não faça parte do horizonte, serão incluídos vetores com valor zero
+    de modo a manter o arquivo compatível.
+    
+    Argumentos
+    ----------
+
+    vazoesHist : histórico de vazões previamente lido/criado/alterado. Deve ser um objeto tipo 'historicoVazoes';
+
+    posto : número do posto de vazão a processar a alteração/inclusão. Deve ser um número inteiro e respeitar o número
+        máximo de postos do arquivo;
+
+    mes : número do mês a alterar/inserir. Inteiro;
+
+    ano : número do mês a alterar/inserir. Inteiro;
+
+    novaVazao : valor da vazão a alterar/inserir. Valores não inteiros serão convertidos automaticamente.
+
+
+    Retorno
+    -------
+
+    Nenhum.
+
+    """
+
+    # Erro se o ano inicial for inferior ao mínimo do histórico.
+    if ano<vazoesHist.anoInicial:
+        raise NameError("Você não pode alterar vazões de anos anteriores a {}.".format(vazoesHist.anoInicial))
+
+    desempenho = registroAtivo.get()
+    if desempenho is not None:
+        marca = desempenho.inicia()
+
+    # Converte o valor da vazão para inteiro.
+    novaVazaoI = int(novaVazao)
+
+    # Históricos compartilhados passam a utilizar uma cópia própria dos dados.
+    preparaEscrita(vazoesHist)
+
+    # Posição do arquivo a escrever o(s) valor(es).
+    pos = (mes-1)+(ano-vazoesHist.anoInicial)*12
+
+    # Altera um valor de vazão já existente no histórico.
+    if ano>=vazoesHist.anoInicial and ano<=vazoesHist.anoFinal:
+        if ((mes-1) in range(0,12)):            
+            vazoesHist.valores[posto][pos] = novaVazaoI
+            
+    # Insere novos anos no histórico.
+    if ano>vazoesHist.anoFinal:        
+        numMeses = 12 * int(ano - vazoesHist.anoInicial + 1)            # número de meses do novo histórico
+        ajustaDados(vazoesHist, numMeses)                               # inclui meses com valor zero e altera o ano final
+        vazoesHist.valores[posto][pos] = novaVazaoI
+
+    if desempenho is not None:
+        desempenho.registra('mudaVazao', 'alteracao', marca, numRegistros=1)
+
+
+def mudaVazoes(vazoesHist, atualizacoes):
+    """
+    Altera/inclui vários valores de/em um objeto 'historicoVazoes' de uma só vez. Equivale a chamar 'mudaVazao' 
+    para cada valor, mas o horizonte é estendido apenas uma vez e todos os valores são escritos em uma única operação.
+    Se houver mais de um valor para o mesmo posto/mês/ano, prevalecerá o último.
+    
+    Argumentos
+    ----------
+
+    vazoesHist : histórico de vazões previamente lido/criado/alterado. Deve ser um objeto tipo 'historicoVazoes';
+
+    atualizacoes : valores a alterar/inserir. Pode ser:
+
+            - dicionário no formato {posto;[[mes, ano, valor], ...]}, tal como retornado por 'lerVazoesExcel';
+
+            - lista ou matriz com uma linha [posto, mes, ano, valor] para cada valor;
+
+            - objeto do tipo 'blocoVazoes' (postos x meses/anos).
+
+
+    Retorno
+    -------
+
+    Nenhum.
+
+    """
+
+    desempenho = registroAtivo.get()
+    if desempenho is not None:
+        marca = desempenho.inicia()
+
+    # Converte as alterações em vetores de postos, meses, anos e valores.
+    if isinstance(atualizacoes, blocoVazoes):
+        valores = np.atleast_2d(np.asarray(atualizacoes.valores, dtype=np.float64))
+        numPostos, numMeses = valores.shape
+        postos = np.repeat(np.asarray(atualizacoes.postos, dtype=np.int64), numMeses)
+        meses = np.tile(np.asarray(atualizacoes.meses, dtype=np.int64), numPostos)
+        anos = np.tile(np.asarray(atualizacoes.anos, dtype=np.int64), numPostos)
+        valores = valores.ravel()
+    else:
+        if isinstance(atualizacoes, dict):
+            atualizacoes = [[posto] + list(alt) for posto, lista in atualizacoes.items() for alt in lista]
+        tabela = np.asarray(atualizacoes, dtype=np.float64).reshape(-1, 4)
+        postos, meses, anos = tabela[:, :3].astype(np.int64).T
+        valores = tabela[:, 3]
+
+    if len(valores)==0:
+        return
+
+    # Erro se o ano inicial for inferior ao mínimo do histórico.
+    if anos.min()<vazoesHist.anoInicial:
+        raise NameError("Você não pode alterar vazões de anos anteriores a {}.".format(vazoesHist.anoInicial))
+
+    if postos.min()<1 or postos.max()>vazoesHist.numPostos:
+        raise NameError("Os postos devem estar entre 1 e {}.".format(vazoesHist.numPostos))
+
+    if meses.min()<1 or meses.max()>12:
+        raise NameError("Os meses devem estar entre 1 e 12.")
+
+    # Converte os valores das vazões para inteiro.
+    valores = np.trunc(valores)
+    if np.abs(valores).max() > np.iinfo(tipoVazao).max:
+        raise NameError("Valores de vazão fora do intervalo permitido.")
+    
+    # Históricos compartilhados passam a utilizar uma cópia própria dos dados.
+    preparaEscrita(vazoesHist)
+
+    # Insere novos anos no histórico, de uma só vez, até o maior ano das alterações.
+    anoMaximo = int(anos.max())
+    if anoMaximo>vazoesHist.anoFinal:
+        ajustaDados(vazoesHist, 12 * (anoMaximo - vazoesHist.anoInicial + 1))
+
+    # Posições (mês, posto) a escrever. Em caso de repetição, mantém apenas a última alteração.
+    pos = (meses-1)+(anos-vazoesHist.anoInicial)*12
+    indices = pos * vazoesHist.numPostos + (postos-1)
+    _, ultimos = np.unique(indices[::-1], return_index=True)
+    ultimos = len(indices) - 1 - ultimos
+
+    vazoesHist.dados[pos[ultimos], postos[ultimos]-1] = valores[ultimos]
+
+    if desempenho is not None:
+        desempenho.registra('mudaVazoes', 'alteracao', marca, numRegistros=len(ultimos))
+
+# Classe que conterá as estatísticas mensais de um histórico de vazões (ver 'calculaEstatisticas').
+# anoInicial e anoFinal : período considerado no cálculo;
+# numPostos : número de postos do histórico;
+# numValores : número de meses com dados (vazão diferente de zero) por mês e posto;
+# mlt, desvio, minimo e maximo : média de longo termo, desvio padrão, mínimo e máximo por mês e posto;
+# percentis : dicionário no formato {percentil; valores por mês e posto};
+# mltAnual : média de longo termo de todos os meses com dados, por posto.
+# As matrizes têm 12 linhas (meses) e uma coluna por posto. Postos/meses sem dados têm valor NaN.
+class estatisticasVazoes:
+    def __init__(self):
+        self.anoInicial = 0
+        self.anoFinal = 0
+        self.numPostos = 0
+        self.numValores = None
+        self.mlt = None
+        self.desvio = None
+        self.minimo = None
+        self.maximo = None
+        self.percentis = {}
+        self.mltAnual = None
+
+def calculaEstatisticas(vazoesHist, anoInicial=None, anoFinal=None, percentis=(10, 50, 90)):
+    """
+    Calcula as estatísticas mensais (MLT, desvio padrão, mínimo, máximo e percentis) de todos os postos de um 
+    histórico de vazões de uma só vez. Meses com vazão igual a zero (sem dados ou incluídos por 'mudaVazao') 
+    são desconsiderados.
+
+    Argumentos
+    ----------
+
+    vazoesHist : objeto do tipo 'historicoVazoes';
+
+    anoInicial : (Opcional) primeiro ano considerado no cálculo. Default: None (ano inicial do histórico).
+
+    anoFinal : (Opcional) último ano considerado no cálculo. Default: None (ano final do histórico).
+
+    percentis : (Opcional) percentis (0 a 100) a calcular, com interpolação linear. Default: (10, 50, 90).
+
+
+    Retorno
+    -------
+
+    Objeto do tipo 'estatisticasVazoes'.
+
+    """
+    if anoInicial is None:
+        anoInicial = vazoesHist.anoInicial
+    if anoFinal is None:
+        anoFinal = vazoesHist.anoFinal
+
+    if anoInicial<vazoesHist.anoInicial or anoFinal>vazoesHist.anoFinal or anoInicial>anoFinal:
+        raise NameError("Período inválido. Utilize anos entre {} e {}.".format(vazoesHist.anoInicial, vazoesHist.anoFinal))
+
+    desempenho = registroAtivo.get()
+    if desempenho is not None:
+        marca = desempenho.inicia()
+
+    # Cubo (anos x meses x postos) do período.
+    inicio = (anoInicial - vazoesHist.anoInicial) * 12
+    fim = (anoFinal - vazoesHist.anoInicial + 1) * 12
+    cubo = vazoesHist.dados[inicio:fim, :vazoesHist.numPostos].reshape(-1, 12, vazoesHist.numPostos)
+    
+    valido = cubo != 0
+    numValores = valido.sum(axis=0)
+    soma = cubo.sum(axis=0, dtype=np.int64)
+
+    estatisticas = estatisticasVazoes()
+    estatisticas.anoInicial = anoInicial
+    estatisticas.anoFinal = anoFinal
+    estatisticas.numPostos = vazoesHist.numPostos
+    estatisticas.numValores = numValores
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        estatisticas.mlt = soma / numValores
+        estatisticas.mltAnual = soma.sum(axis=0) / numValores.sum(axis=0)
+        
+        # Cubo em ponto flutuante, com NaN nos meses sem dados.
+        cuboF = np.where(valido, cubo, np.nan)
+        estatisticas.desvio = np.sqrt(np.nansum((cuboF - estatisticas.mlt)**2, axis=0) / numValores)
+
+    # Mínimos e máximos.
+    semDados = numValores == 0
+    estatisticas.minimo = np.where(semDados, np.nan, np.where(valido, cubo, np.iinfo(tipoVazao).max).min(axis=0))
+    estatisticas.maximo = np.where(semDados, np.nan, np.where(valido, cubo, np.iinfo(tipoVazao).min).max(axis=0))
+
+    # Percentis: os meses sem dados (NaN) ficam no final do cubo ordenado e as posições são calculadas
+    # a partir do número de meses com dados de cada mês/posto.
+    ordenado = np.sort(cuboF, axis=0)
+    for p in percentis:
+        posicao = np.maximum(numValores - 1, 0) * (p / 100)
+        inferior = np.floor(posicao).astype(np.int64)
+        superior = np.ceil(posicao).astype(np.int64)
+        vInferior = np.take_along_axis(ordenado, inferior[np.newaxis], axis=0)[0]
+        vSuperior = np.take_along_axis(ordenado, superior[np.newaxis], axis=0)[0]
+        estatisticas.percentis[p] = vInferior + (vSuperior - vInferior) * (posicao - inferior)
+
+    if desempenho is not None:
+        desempenho.registra('calculaEstatisticas', 'calculo', marca, numRegistros=fim - inicio)
+
+    return estatisticas
+
+def calculaMLTS(vazoesHist, anoInicial=None, anoFinal=None):
+    """
+    Calcula as MLTs mensais de todos os postos de um histórico de vazões, desconsiderando os meses com vazão 
+    igual a zero. Os valores são arredondados para inteiros, tal como no arquivo 'mlt.dat'.
+
+    Argumentos
+    ----------
+
+    vazoesHist : objeto do tipo 'historicoVazoes';
+
+    anoInicial : (Opcional) primeiro ano considerado no cálculo. Default: None (ano inicial do histórico).
+
+    anoFinal : (Opcional) último ano considerado no cálculo. Default: None (ano final do histórico).
+
+
+    Retorno
+    -------
+
+    Objeto 'tabelaMLTS', idêntico ao retornado por 'leMLTS'. Postos sem dados terão MLTs iguais a zero.
+    
+    """
+    mlt = calculaEstatisticas(vazoesHist, anoInicial, anoFinal, percentis=()).mlt
+
+    return tabelaMLTS(np.rint(np.nan_to_num(mlt)).astype(tipoVazao))
+
+def salvaMLTS(nomeArquivo, mlts, numPostos=None):
+    """
+    Salva as MLTs mensais em um arquivo binário no formato do ONS ('mlt.dat').
+
+    Argumentos
+    ----------
+
+    nomeArquivo : nome do arquivo a salvar;
+
+    mlts : dicionário no formato {posto;[mlt jan, mlt fev, ... mlt dez]}, tal como retornado por 'leMLTS' ou 
+        'calculaMLTS';
+
+    numPostos : (Opcional) número de postos do arquivo. Default: None (maior posto do dicionário).
+        Postos ausentes do dicionário terão MLTs iguais a zero.
+
+
+    Retorno
+    -------
+
+    Nenhum.
+
+    """
+    if numPostos is None:
+        numPostos = max(mlts)
+
+    # Matriz (meses x postos), na mesma ordem do arquivo.
+    if isinstance(mlts, tabelaMLTS) and mlts.valores.shape[1]==numPostos:
+        # As MLTs já estão no formato do arquivo: nenhuma cópia por posto é necessária.
+        dados = np.ascontiguousarray(mlts.valores, dtype=tipoVazao)
+    else:
+        dados = np.zeros((12, numPostos), dtype=tipoVazao)
+        for posto, valores in mlts.items():
+            if posto <= numPostos:
+                dados[:, posto-1] = valores
+
+    desempenho = registroAtivo.get()
+    if desempenho is not None:
+        marca = desempenho.inicia()
+
+    # Todos os registros são escritos de uma só vez.
+    try:
+        with open(nomeArquivo, 'wb') as f:
+            f.write(dados.tobytes())
+    except:
+        raise NameError("Erro ao tentar salvar o arquivo binário de MLTs: {}".format(nomeArquivo))
+
+    if desempenho is not None:
+        desempenho.registra('salvaMLTS', 'escrita', marca, numBytes=dados.nbytes, numRegistros=len(dados))
+
+def salvaPostos(nomeArquivo, postos, numPostos=None):
+    """
+    Salva os dados básicos dos postos de vazão (nome, ano inicial e ano final) em um arquivo binário no 
+    formato do ONS ('postos.dat').
+
+    Argumentos
+    ----------
+
+    nomeArquivo : nome do arquivo a salvar;
+
+    postos : objeto 'tabelaPostos' (retornado por 'lePostos') ou dicionário no formato 
+        {número do posto; objeto 'postoVazao'};
+
+    numPostos : (Opcional) número de postos do arquivo. Default: None (maior posto de 'postos').
+        Postos ausentes terão nome em branco e anos iguais a zero, tal como no arquivo do ONS.
+
+
+    Retorno
+    -------
+
+    Nenhum.
+
+    """
+    if numPostos is None:
+        numPostos = max(postos) if len(postos) else 0
+
+    # Vetores com os dados de todos os postos, na mesma ordem do arquivo.
+    if isinstance(postos, tabelaPostos) and len(postos)==numPostos:
+        nomes, anosIniciais, anosFinais = postos.nomes, postos.anosIniciais, postos.anosFinais
+    else:
+        nomes = np.zeros(numPostos, dtype='U12')
+        anosIniciais = np.zeros(numPostos, dtype=np.int32)
+        anosFinais = np.zeros(numPostos, dtype=np.int32)
+        for posto, dados in postos.items():
+            if posto <= numPostos:
+                nomes[posto-1] = dados.nomePosto
+                anosIniciais[posto-1] = dados.anoInicial
+                anosFinais[posto-1] = dados.anoFinal
+
+    # Converte os nomes para 'latin1' (um byte por caractere), completando-os com espaços.
+    caracteres = np.ascontiguousarray(nomes, dtype='U12').view('<u4').reshape(-1, 12)
+    if (caracteres > 255).any():
+        raise NameError("Nomes de postos com caracteres inválidos (não 'latin1') em: {}".format(nomeArquivo))
+    caracteres = np.where(caracteres==0, 32, caracteres).astype(np.uint8)
+
+    # Registros no formato "=12sii": nome do posto, ano inicial e ano final.
+    formatoDados = np.dtype([('nome', 'S12'), ('anoInicial', '<i4'), ('anoFinal', '<i4')])
+    registros = np.zeros(numPostos, dtype=formatoDados)
+    registros['nome'] = caracteres.view('S12')[:, 0]
+    registros['anoInicial'] = anosIniciais
+    registros['anoFinal'] = anosFinais
+
+    desempenho = registroAtivo.get()
+    if desempenho is not None:
+        marca = desempenho.inicia()
+
+    # Todos os registros são escritos de uma só vez.
+    try:
+        with open(nomeArquivo, 'wb') as f:
+            f.write(registros.tobytes())
+    except:
+        raise NameError("Erro ao tentar salvar o arquivo binário de postos: {}".format(nomeArquivo))
+
+    if desempenho is not None:
+        desempenho.registra('salvaPostos', 'escrita', marca, numBytes=registros.nbytes, numRegistros=len(registros))
+
+# Classe que conterá um modelo periódico autorregressivo de ordem 1 (PAR(1)) ajustado ao logaritmo das vazões de 
+# cada posto e mês (ver 'ajustaPAR').
+# media e desvio : média e desvio padrão do logaritmo das vazões, por mês (linhas) e posto (colunas). Se as MLTs 
+#   forem fornecidas, a média é ajustada para que a média das vazões geradas seja igual à MLT;
+# phi : coeficiente de autocorrelação entre cada mês e o mês anterior, por mês e posto;
+# residuos : resíduos padronizados do histórico (anos x meses x postos), reamostrados na geração dos cenários. 
+#   Meses sem dados têm valor NaN;
+# ativo : indica os meses/postos com dados. Meses/postos sem dados terão vazões iguais a zero nos cenários.
+class modeloPAR:
+    def __init__(self):
+        self.media = None
+        self.desvio = None
+        self.phi = None
+        self.residuos = None
+        self.ativo = None
+
+def ajustaPAR(vazoesHist, mlts=None):
+    """
+    Ajusta um modelo periódico autorregressivo de ordem 1 (PAR(1)) ao logaritmo das vazões de todos os postos 
+    de um histórico, de uma só vez. Meses com vazão igual a zero (sem dados ou incluídos por 'mudaVazao') são 
+    desconsiderados.
+
+    Argumentos
+    ----------
+
+    vazoesHist : objeto do tipo 'historicoVazoes';
+
+    mlts : (Opcional) MLTs no formato retornado por 'leMLTS' ou 'calculaMLTS'. Se fornecidas, as vazões geradas 
+        terão média igual às MLTs (nos meses/postos com MLT positiva). Default: None ('vazoesHist.mlts', se houver).
+
+
+    Retorno
+    -------
+
+    Objeto do tipo 'modeloPAR'.
+
+    """
+    numAnos = len(vazoesHist.dados) // 12
+    numPostos = vazoesHist.numPostos
+    
+    if numAnos==0:
+        raise NameError("O histórico deve conter, pelo menos, um ano completo.")
+
+    # Logaritmo das vazões (anos x meses x postos), com NaN nos meses sem dados.
+    cubo = vazoesHist.dados[:numAnos*12, :numPostos].reshape(numAnos, 12, numPostos)
+    valido = cubo > 0
+    logs = np.where(valido, np.log(np.where(valido, cubo, 1)), np.nan)
+
+    # Média e desvio padrão por mês e posto.
+    numValores = valido.sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        media = np.nansum(logs, axis=0) / numValores
+        desvio = np.sqrt(np.nansum((logs - media)**2, axis=0) / numValores)
+    
+    ativo = numValores > 0
+    media = np.where(ativo, media, 0)
+    desvio = np.where(ativo, desvio, 0)
+
+    # Valores padronizados e valores do mês anterior (o mês anterior a janeiro é o dezembro do ano anterior).
+    with np.errstate(invalid='ignore', divide='ignore'):
+        z = np.where(desvio > 0, (logs - media) / desvio, np.where(valido, 0.0, np.nan))
+    zAnterior = np.full_like(z, np.nan)
+    zAnterior.reshape(-1, numPostos)[1:] = z.reshape(-1, numPostos)[:-1]
+
+    # Autocorrelação entre cada mês e o mês anterior, considerando apenas os pares com dados.
+    pares = ~np.isnan(z) & ~np.isnan(zAnterior)
+    zP = np.where(pares, z, 0)
+    zAP = np.where(pares, zAnterior, 0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        phi = (zP * zAP).sum(axis=0) / np.sqrt((zP**2).sum(axis=0) * (zAP**2).sum(axis=0))
+    phi = np.clip(np.nan_to_num(phi), -0.99, 0.99)
+
+    modelo = modeloPAR()
+    modelo.desvio = desvio
+    modelo.phi = phi
+    modelo.ativo = ativo
+    modelo.residuos = (z - phi * zAnterior) / np.sqrt(1 - phi**2)
+
+    # A média do logaritmo é ajustada para que a média (lognormal) das vazões seja igual à MLT.
+    if mlts is None:
+        mlts = vazoesHist.mlts
+    if mlts is not None:
+        alvo = np.zeros((12, numPostos))
+        for posto, valores in mlts.items():
+            if posto <= numPostos:
+                alvo[:, posto-1] = valores
+        with np.errstate(divide='ignore'):
+            media = np.where(ativo & (alvo > 0), np.log(np.maximum(alvo, 1)) - desvio**2 / 2, media)
+    
+    modelo.media = media
+
+    return modelo
+
+def geraCenarios(vazoesHist, numCenarios, numAnos=None, metodo='par', semente=None, mlts=None, workers=None):
+    """
+    Gera cenários sintéticos de vazões para todos os postos de um histórico, de uma só vez.
+
+    Argumentos
+    ----------
+
+    vazoesHist : objeto do tipo 'historicoVazoes' utilizado no ajuste dos modelos;
+
+    numCenarios : número de cenários a gerar;
+
+    numAnos : (Opcional) número de anos de cada cenário. Default: None (número de anos do histórico).
+
+    metodo : (Opcional) método de geração. Default: 'par'.
+        Existem dois métodos possíveis:
+
+            'reamostragem' - cada ano dos cenários é um ano do histórico sorteado (com reposição). Mantém as 
+                             correlações entre postos e entre os meses de um mesmo ano;
+
+            'par' - modelo PAR(1) ajustado por posto e mês (ver 'ajustaPAR'). Os resíduos de cada mês são 
+                    sorteados de um mesmo ano do histórico para todos os postos, mantendo as correlações entre postos.
+
+    semente : (Opcional) semente do gerador de números aleatórios. A mesma semente gera os mesmos cenários, 
+        independentemente de 'workers'. Default: None.
+
+    mlts : (Opcional) MLTs utilizadas no método 'par' (ver 'ajustaPAR'). Default: None.
+
+    workers : (Opcional) número de 'threads' utilizadas no método 'par', cada uma com um grupo de postos. 
+        Default: None (número de processadores).
+
+
+    Retorno
+    -------
+
+    Matriz (cenários x meses x postos) de inteiros de 32 bits. Cada cenário (cenarios[i]) tem o mesmo formato 
+    da matriz 'dados' de um 'historicoVazoes' e inicia no ano inicial do histórico (ver 'salvaCenarios').
+
+    """
+    if metodo not in ('reamostragem', 'par'):
+        raise NameError("Método de geração inválido!\nUtilize 'reamostragem' ou 'par'.")
+
+    numAnosHist = len(vazoesHist.dados) // 12
+    numPostos = vazoesHist.numPostos
+    
+    if numAnosHist==0:
+        raise NameError("O histórico deve conter, pelo menos, um ano completo.")
+
+    if numAnos is None:
+        numAnos = numAnosHist
+
+    gerador = np.random.default_rng(semente)
+
+    desempenho = registroAtivo.get()
+    if desempenho is not None:
+        marca = desempenho.inicia()
+
+    if (metodo=='reamostragem'):
+        cubo = vazoesHist.dados[:numAnosHist*12, :numPostos].reshape(numAnosHist, 12, numPostos)
+        anos = gerador.integers(0, numAnosHist, size=(numCenarios, numAnos))
+        cenarios = np.ascontiguousarray(cubo[anos], dtype=tipoVazao).reshape(numCenarios, numAnos*12, numPostos)
+
+    else:
+        modelo = ajustaPAR(vazoesHist, mlts)
+        numMeses = numAnos * 12
+
+        # Os resíduos ausentes (meses sem dados) são substituídos por valores da distribuição normal padrão.
+        residuos = modelo.residuos.copy()
+        ausentes = np.isnan(residuos)
+        residuos[ausentes] = gerador.standard_normal(ausentes.sum())
+
+        # Anos do histórico dos quais são sorteados os resíduos de cada cenário/mês e o valor inicial (dezembro).
+        anosResiduos = gerador.integers(0, numAnosHist, size=(numCenarios, numMeses))
+        zInicial = residuos[gerador.integers(0, numAnosHist, size=numCenarios), 11]
+
+        fatorResiduo = np.sqrt(1 - modelo.phi**2)
+        maximo = np.log(np.iinfo(tipoVazao).max)
+        cenarios = np.empty((numCenarios, numMeses, numPostos), dtype=tipoVazao)
+
+        # Cada 'thread' simula um grupo de postos, mês a mês, para todos os cenários de uma só vez.
+        def simula(colunas):
+            z = zInicial[:, colunas]
+            for t in range(numMeses):
+                m = t % 12
+                z = modelo.phi[m, colunas] * z + fatorResiduo[m, colunas] * residuos[anosResiduos[:, t], m, colunas]
+                logs = np.minimum(modelo.media[m, colunas] + modelo.desvio[m, colunas] * z, maximo)
+                cenarios[:, t, colunas] = np.rint(np.exp(logs)) * modelo.ativo[m, colunas]
+
+        numGrupos = min(workers or os.cpu_count() or 1, max(numPostos, 1))
+        limites = np.linspace(0, numPostos, numGrupos + 1).astype(int)
+        grupos = [slice(limites[i], limites[i+1]) for i in range(numGrupos) if limites[i+1]>limites[i]]
+        
+        with ThreadPoolExecutor(max_workers=len(grupos) or 1) as executor:
+            list(executor.map(simula, grupos))
+
+    if desempenho is not None:
+        desempenho.registra('geraCenarios', metodo, marca, numBytes=cenarios.nbytes, numRegistros=numCenarios)
+
+    return cenarios
+
+def salvaCenarios(nomeModelo, cenarios, primeiro=1, workers=None):
+    """
+    Salva cenários de vazões em arquivos binários no formato CEPEL/ONS, um arquivo por cenário. Cada arquivo é 
+    escrito de uma só vez e vários arquivos são escritos simultaneamente.
+
+    Argumentos
+    ----------
+
+    nomeModelo : modelo do nome dos arquivos, com o número do cenário no formato do método 'format' 
+        (ex.: 'cenarios/vazoes_{:04d}.dat'). Os diretórios inexistentes são criados;
+
+    cenarios : matriz (cenários x meses x postos), tal como retornada por 'geraCenarios' ou 'leVariosVazoes' 
+        (com empilhar=True);
+
+    primeiro : (Opcional) número do primeiro cenário, utilizado nos nomes dos arquivos. Permite salvar os cenários 
+        gerados em lotes. Default: 1.
+
+    workers : (Opcional) número máximo de arquivos escritos simultaneamente. Default: None (número de processadores).
+
+
+    Retorno
+    -------
+
+    Lista com os nomes dos arquivos salvos.
+
+    """
+    nomes = [nomeModelo.format(primeiro + i) for i in range(len(cenarios))]
+
+    # Cria os diretórios dos arquivos, se necessário.
+    try:
+        for diretorio in set(os.path.dirname(nome) for nome in nomes):
+            if diretorio:
+                os.makedirs(diretorio, exist_ok=True)
+    except:
+        raise NameError("Erro ao criar o diretório dos cenários: {}".format(nomeModelo))
+
+    desempenho = registroAtivo.get()
+    if desempenho is not None:
+        marca = desempenho.inicia()
+
+    def escreve(i):
+        try:
+            dados = np.ascontiguousarray(cenarios[i], dtype=tipoVazao)
+            with open(nomes[i], 'wb') as f:
+                f.write(memoryview(dados).cast('B'))
+        except:
+            raise NameError("Erro ao tentar salvar o arquivo binário de vazões: {}".format(nomes[i]))
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(escreve, range(len(nomes))))
+
+    if desempenho is not None:
+        desempenho.registra('salvaCenarios', 'escrita', marca, numBytes=len(nomes) * cenarios[0].nbytes if nomes else 0, 
+                            numRegistros=len(nomes))
+
+    return nomes
+
+def comparaVazoes(arqA, arqB, anoInicial=1931, numPostos=320, registrosPorBloco=1024):
+    """
+    Compara dois arquivos binários de vazões, retornando apenas os valores diferentes.
+
+    Os arquivos são lidos em blocos de registros. Blocos idênticos são descartados por uma simples comparação 
+    de bytes e apenas os blocos diferentes são convertidos e comparados valor a valor. Se um dos arquivos for 
+    menor, os registros ausentes são considerados iguais a zero.
+
+    Argumentos
+    ----------
+
+    arqA : nome do arquivo binário de vazões original;
+
+    arqB : nome do arquivo binário de vazões alterado;
+
+    anoInicial : (Opcional) ano inicial dos históricos de vazões. Default: 1931.
+
+    numeroPostos : (Opcional) número de postos contidos nos históricos de vazões. Default: 320.
+        Se None, o número de postos será determinado automaticamente a partir de 'arqA' (ver 'detectaNumPostos').
+
+    registrosPorBloco : (Opcional) número de registros (meses) lidos de cada vez. Default: 1024.
+
+
+    Retorno
+    -------
+
+    Lista de tuplas (posto, mes, ano, valor em arqA, valor em arqB), na ordem dos registros dos arquivos.
+
+    """
+    if numPostos is None:
+        numPostos = detectaNumPostos(arqA)
+
+    tamRegistro = numPostos * tipoVazao.itemsize
+    tamBloco = registrosPorBloco * tamRegistro
+    diferencas = []
+    numBytes = 0
+
+    desempenho = registroAtivo.get()
+    if desempenho is not None:
+        marca = desempenho.inicia()
+
+    try:
+        with open(arqA, 'rb') as fa, open(arqB, 'rb') as fb:
+            for f, nomeArquivo in ((fa, arqA), (fb, arqB)):
+                tamanho = os.fstat(f.fileno()).st_size
+                if (tamanho % tamRegistro != 0):
+                    raise NameError("Arquivo binário de vazões incompatível com {} postos:{}.".format(numPostos, nomeArquivo))
+                verificaNumPostos(tamanho // tipoVazao.itemsize, numPostos, nomeArquivo)
+
+            registro = 0
+            while True:
+                ba = fa.read(tamBloco)
+                bb = fb.read(tamBloco)
+                
+                if not ba and not bb:
+                    break
+
+                numBytes = numBytes + len(ba) + len(bb)
+
+                # Somente blocos diferentes são convertidos e comparados valor a valor.
+                if ba != bb:
+                    numRegistros = max(len(ba), len(bb)) // tamRegistro
+                    va = np.zeros((numRegistros, numPostos), dtype=tipoVazao)
+                    vb = np.zeros((numRegistros, numPostos), dtype=tipoVazao)
+                    va.ravel()[:len(ba)//tipoVazao.itemsize] = np.frombuffer(ba, dtype=tipoVazao)
+                    vb.ravel()[:len(bb)//tipoVazao.itemsize] = np.frombuffer(bb, dtype=tipoVazao)
+
+                    linhas, colunas = np.nonzero(va != vb)
+                    pos = linhas + registro
+                    diferencas.extend(zip((colunas + 1).tolist(), (pos % 12 + 1).tolist(), (pos // 12 + anoInicial).tolist(),
+                                          va[linhas, colunas].tolist(), vb[linhas, colunas].tolist()))
+
+                registro = registro + registrosPorBloco
+    except NameError:
+        raise
+    except:
+        raise NameError("Erro ao comparar arquivos binários de vazões: {} e {}.".format(arqA, arqB))
+
+    if desempenho is not None:
+        desempenho.registra('comparaVazoes', 'comparacao', marca, numBytes=numBytes, numRegistros=len(diferencas))
+
+    return diferencas
+
+def aplicaPatch(nomeArquivo, diferencas, anoInicial=1931, numPostos=320, verificar=True):
+    """
+    Aplica a um arquivo binário de vazões as diferenças obtidas com 'comparaVazoes'. O arquivo é reescrito 
+    no modo atômico (ver 'salvaArquivo').
+
+    Argumentos
+    ----------
+
+    nomeArquivo : nome do arquivo binário de vazões a alterar;
+
+    diferencas : lista de tuplas (posto, mes, ano, valor original, novo valor), tal como retornada por 'comparaVazoes';
+
+    anoInicial : (Opcional) ano inicial do histórico de vazões. Default: 1931.
+
+    numeroPostos : (Opcional) número de postos contidos no histórico de vazões. Default: 320.
+
+    verificar : (Opcional) se True, verifica se os valores originais das diferenças coincidem com os valores do 
+        arquivo antes de alterá-lo. Valores fora do horizonte do arquivo são considerados iguais a zero. Default: True.
+
+
+    Retorno
+    -------
+
+    Nenhum.
+
+    """
+    if len(diferencas)==0:
+        return
+
+    vazoesHist = leVazoes(nomeArquivo, anoInicial, numPostos)
+    tabela = np.asarray(diferencas, dtype=np.int64).reshape(-1, 5)
+
+    if verificar:
+        postos, meses, anos, originais = tabela[:, :4].T
+        pos = (meses-1)+(anos-anoInicial)*12
+        atuais = np.zeros(len(tabela), dtype=np.int64)
+        noHorizonte = (pos>=0) & (pos<len(vazoesHist.dados)) & (postos>=1) & (postos<=numPostos)
+        atuais[noHorizonte] = vazoesHist.dados[pos[noHorizonte], postos[noHorizonte]-1]
+        
+        if np.any(atuais != originais):
+            i = np.flatnonzero(atuais != originais)[0]
+            raise NameError("O valor do posto {} em {}/{} não corresponde ao valor original das diferenças.".format(
+                            postos[i], meses[i], anos[i]))
+
+    mudaVazoes(vazoesHist, tabela[:, [0, 1, 2, 4]])
+    salvaArquivo(nomeArquivo, vazoesHist, atomico=True)
+
+
+def indicePostos(postos):
+    """
+    Cria um índice dos números dos postos por nome.
+
+    Argumentos
+    ----------
+
+    postos : dicionário no formato {número do posto; objeto 'postoVazao'}, tal como retornado por 'lePostos'.
+
+
+    Retorno
+    -------
+
+    Dicionário no formato {nome do posto (maiúsculas); [números dos postos]}. Alguns nomes (ex.: 'JORDAO') 
+    correspondem a mais de um posto.
+
+    """
+    indice = {}
+    for posto, dados in postos.items():
+        nome = dados.nomePosto.strip().upper()
+        if nome:
+            indice.setdefault(nome, []).append(posto)
+
+    return indice
+
+def consultaVazoes(vazoesHist, postos=None, inicio=None, fim=None):
+    """
+    Consulta as vazões de postos (por número ou nome) em um período, sem copiar os dados.
+
+    Argumentos
+    ----------
+
+    vazoesHist : objeto do tipo 'historicoVazoes';
+
+    postos : (Opcional) lista com números e/ou nomes de postos (ex.: ['CAMARGOS', 6]). A consulta por nome utiliza 
+        os dados de 'vazoesHist.postos' (ver 'lePostos'). Nomes que correspondem a mais de um posto retornam 
+        todos eles. Default: None (todos os postos).
+
+    inicio : (Opcional) tupla (mes, ano) do primeiro mês do período. Default: None (primeiro mês do histórico).
+
+    fim : (Opcional) tupla (mes, ano) do último mês do período. Default: None (último mês do histórico).
+
+
+    Retorno
+    -------
+
+    Dicionário no formato {número do posto; vazões do período}. As vazões são visões da matriz 'dados' do 
+    histórico, de modo que alterações feitas nelas são refletidas no histórico.
+
+    """
+    numMeses = len(vazoesHist.dados)
+
+    if any(mesAno is not None and not (1 <= mesAno[0] <= 12) for mesAno in (inicio, fim)):
+        raise NameError("Os meses devem estar entre 1 e 12.")
+
+    # Meses inicial e final (exclusivo) do período.
+    if inicio is None:
+        pos = 0
+    else:
+        pos = (inicio[0]-1)+(inicio[1]-vazoesHist.anoInicial)*12
+    
+    if fim is None:
+        posFim = numMeses
+    else:
+        posFim = fim[0]+(fim[1]-vazoesHist.anoInicial)*12
+
+    if pos<0 or posFim>numMeses or pos>=posFim:
+        raise NameError("Período inválido. Utilize meses entre 1/{} e 12/{}.".format(vazoesHist.anoInicial, vazoesHist.anoFinal))
+
+    # Converte os nomes em números de postos.
+    if postos is None:
+        numeros = range(1, vazoesHist.numPostos+1)
+    else:
+        numeros = []
+        for posto in postos:
+            if isinstance(posto, str):
+                if vazoesHist.postos is None:
+                    raise NameError("Consultas por nome exigem os dados dos postos (ver 'lePostos').")
+                if vazoesHist.indiceNomes is None:
+                    vazoesHist.indiceNomes = indicePostos(vazoesHist.postos)
+                if posto.strip().upper() not in vazoesHist.indiceNomes:
+                    raise NameError("Posto não encontrado: {}.".format(posto))
+                numeros.extend(vazoesHist.indiceNomes[posto.strip().upper()])
+            else:
+                numeros.append(posto)
+
+    if any(not (1 <= posto <= vazoesHist.numPostos) for posto in numeros):
+        raise NameError("Os postos devem estar entre 1 e {}.".format(vazoesHist.numPostos))
+
+    return {posto: vazoesHist.dados[pos:posFim, posto-1] for posto in numeros}
+
+
+# Classe que conterá o resultado da validação de um histórico de vazões (ver 'validaVazoes').
+# negativos : vazões negativas;
+# lacunas : vazões iguais a zero (ex.: meses incluídos por 'mudaVazao') nos anos de operação do posto ou, se os 
+#   dados dos postos não forem fornecidos, em postos que possuem alguma vazão diferente de zero;
+# foraJanela : vazões diferentes de zero fora dos anos de operação do posto (anoInicial a anoFinal, ver 'lePostos');
+# outliers : vazões acima de 'limiteSuperior' vezes a MLT ou, se 'limiteInferior' for positivo, vazões positivas 
+#   abaixo de 'limiteInferior' vezes a MLT (ver 'leMLTS').
+# Cada item é uma matriz (numpy) com uma linha por valor e três colunas (posto, mes, ano), ordenada por posto e mês.
+class relatorioValidacao:
+    def __init__(self):
+        self.negativos = np.zeros((0, 3), dtype=np.int64)
+        self.lacunas = np.zeros((0, 3), dtype=np.int64)
+        self.foraJanela = np.zeros((0, 3), dtype=np.int64)
+        self.outliers = np.zeros((0, 3), dtype=np.int64)
+
+    def numProblemas(self):
+        return len(self.negativos) + len(self.lacunas) + len(self.foraJanela) + len(self.outliers)
+
+    def valido(self):
+        return self.numProblemas()==0
+
+def celulasMascara(mascara, anoInicial):
+    """
+    Converte uma máscara (meses x postos) em uma matriz com as linhas (posto, mes, ano) dos valores marcados, 
+    ordenadas por posto e mês. Função auxiliar de 'validaVazoes'.
+    """
+    if not mascara.any():
+        return np.zeros((0, 3), dtype=np.int64)
+
+    # A busca é feita na ordem da memória (meses x postos) e o resultado é reordenado por posto.
+    linhas, colunas = np.nonzero(mascara)
+    ordem = np.argsort(colunas, kind='stable')
+    linhas = linhas[ordem]
+    colunas = colunas[ordem]
+
+    return np.column_stack((colunas + 1, linhas % 12 + 1, linhas // 12 + anoInicial)).astype(np.int64)
+
+def validaVazoes(vazoesHist, postos=None, mlts=None, limiteSuperior=10.0, limiteInferior=0.0):
+    """
+    Valida todas as vazões de um histórico de uma só vez, verificando vazões negativas, lacunas (vazões iguais 
+    a zero), vazões fora dos anos de operação dos postos e valores atípicos em relação às MLTs.
+
+    Argumentos
+    ----------
+
+    vazoesHist : objeto do tipo 'historicoVazoes';
+
+    postos : (Opcional) dados dos postos no formato retornado por 'lePostos'. Se None, serão utilizados os dados 
+        de 'vazoesHist.postos' e, se estes também não existirem, a verificação dos anos de operação não é feita. 
+        Postos com ano inicial igual a zero são considerados sem anos de operação definidos e não são verificados;
+
+    mlts : (Opcional) MLTs no formato retornado por 'leMLTS' ou 'calculaMLTS'. Se None, serão utilizadas as MLTs 
+        de 'vazoesHist.mlts' e, se estas também não existirem, a verificação de valores atípicos não é feita. 
+        Meses/postos com MLT igual a zero não são verificados;
+
+    limiteSuperior : (Opcional) múltiplo da MLT acima do qual uma vazão é considerada atípica. Default: 10.
+
+    limiteInferior : (Opcional) múltiplo da MLT abaixo do qual uma vazão positiva é considerada atípica. 
+        Default: 0 (sem verificação).
+
+
+    Retorno
+    -------
+
+    Objeto do tipo 'relatorioValidacao'.
+
+    """
+    if postos is None:
+        postos = vazoesHist.postos
+    if mlts is None:
+        mlts = vazoesHist.mlts
+
+    desempenho = registroAtivo.get()
+    if desempenho is not None:
+        marca = desempenho.inicia()
+
+    numPostos = vazoesHist.numPostos
+    dados = vazoesHist.dados[:, :numPostos]
+    numMeses = len(dados)
+    relatorio = relatorioValidacao()
+
+    relatorio.negativos = celulasMascara(dados < 0, vazoesHist.anoInicial)
+    zeros = dados == 0
+
+    if postos is not None:
+        # Anos inicial e final de cada posto.
+        if isinstance(postos, tabelaPostos):
+            anosIniciais = postos.anosIniciais[:numPostos]
+            anosFinais = postos.anosFinais[:numPostos]
+        else:
+            anosIniciais = np.zeros(numPostos, dtype=np.int64)
+            anosFinais = np.zeros(numPostos, dtype=np.int64)
+            for posto, dadosPosto in postos.items():
+                if posto <= numPostos:
+                    anosIniciais[posto-1] = dadosPosto.anoInicial
+                    anosFinais[posto-1] = dadosPosto.anoFinal
+        
+        anosIniciais = np.pad(anosIniciais, (0, numPostos - len(anosIniciais)))
+        anosFinais = np.pad(anosFinais, (0, numPostos - len(anosFinais)))
+
+        # Meses (linhas) x postos (colunas) dentro dos anos de operação de cada posto. A comparação é feita por 
+        # ano e repetida para os 12 meses.
+        anos = vazoesHist.anoInicial + np.arange(-(-numMeses // 12))
+        definido = anosIniciais > 0
+        dentro = (anos[:, np.newaxis] >= anosIniciais) & (anos[:, np.newaxis] <= anosFinais)
+        dentro = np.repeat(dentro, 12, axis=0)[:numMeses]
+
+        relatorio.lacunas = celulasMascara(zeros & dentro, vazoesHist.anoInicial)
+        relatorio.foraJanela = celulasMascara(~zeros & ~dentro & definido, vazoesHist.anoInicial)
+    else:
+        relatorio.lacunas = celulasMascara(zeros & ~zeros.all(axis=0), vazoesHist.anoInicial)
+
+    if mlts is not None:
+        # MLTs (meses x postos), repetidas para todos os anos do histórico.
+        if isinstance(mlts, tabelaMLTS):
+            mlt = mlts.valores[:, :numPostos]
+        else:
+            mlt = np.zeros((12, numPostos), dtype=np.int64)
+            for posto, valores in mlts.items():
+                if posto <= numPostos:
+                    mlt[:, posto-1] = valores
+        
+        mlt = np.pad(mlt, ((0, 0), (0, numPostos - mlt.shape[1])))
+        mlt = np.tile(mlt, (-(-numMeses // 12), 1))[:numMeses]
+
+        atipicos = (mlt > 0) & (dados > limiteSuperior * mlt)
+        if limiteInferior > 0:
+            atipicos |= (mlt > 0) & (dados > 0) & (dados < limiteInferior * mlt)
+
+        relatorio.outliers = celulasMascara(atipicos, vazoesHist.anoInicial)
+
+    if desempenho is not None:
+        desempenho.registra('validaVazoes', 'validacao', marca, numBytes=dados.nbytes, numRegistros=numMeses)
+
+    return relatorio
+
+# Cache, compartilhado por todo o processo, dos arquivos lidos por 'lePostosCache', 'leMLTSCache' e 'leVazoesCache'.
+# entradas : dicionário ordenado (do menos para o mais recentemente utilizado) no formato 
+#   {(função, arquivo, argumentos); (data de modificação e tamanho do arquivo, objeto lido, tamanho em bytes)};
+# tamanhoMaximo : memória máxima (em bytes) ocupada pelos objetos do cache;
+# tamanhoAtual : memória ocupada pelos objetos do cache;
+# diretorio : (opcional) diretório onde os objetos lidos também são salvos, acelerando a primeira leitura de 
+#   outros processos.
+class cacheArquivos:
+    def __init__(self, tamanhoMaximo=512*2**20, diretorio=None):
+        self.entradas = OrderedDict()
+        self.tamanhoMaximo = tamanhoMaximo
+        self.tamanhoAtual = 0
+        self.diretorio = diretorio
+        self.trava = threading.Lock()
+
+cacheGlobal = cacheArquivos()
+
+def configuraCache(tamanhoMaximo=512*2**20, diretorio=None):
+    """
+    Configura o cache de arquivos lidos por 'lePostosCache', 'leMLTSCache' e 'leVazoesCache', descartando 
+    os objetos já armazenados.
+
+    Argumentos
+    ----------
+
+    tamanhoMaximo : (Opcional) memória máxima (em bytes) ocupada pelos objetos do cache. Quando excedida, os objetos 
+        utilizados há mais tempo são descartados. Default: 512 MB.
+
+    diretorio : (Opcional) diretório onde os objetos lidos também são salvos ('.npy' para vazões e '.pkl' para os 
+        demais). Outros processos utilizam estes arquivos em vez de ler novamente os originais. Apenas a versão 
+        mais recente de cada arquivo lido é mantida. Default: None.
+
+
+    Retorno
+    -------
+
+    Nenhum.
+
+    """
+    global cacheGlobal
+
+    if diretorio is not None:
+        os.makedirs(diretorio, exist_ok=True)
+
+    cacheGlobal = cacheArquivos(tamanhoMaximo, diretorio)
+
+def limpaCache():
+    """
+    Descarta todos os objetos do cache de arquivos (o diretório do cache, se houver, não é alterado).
+    """
+    with cacheGlobal.trava:
+        cacheGlobal.entradas.clear()
+        cacheGlobal.tamanhoAtual = 0
+
+def leComCache(funcao, nomeArquivo, argumentos):
+    """
+    Retorna o objeto lido por 'funcao(nomeArquivo, *argumentos)', utilizando o cache de arquivos. O arquivo 
+    somente é lido novamente se sua data de modificação ou seu tamanho forem alterados. Função auxiliar de 
+    'lePostosCache', 'leMLTSCache' e 'leVazoesCache'.
+
+    Argumentos
+    ----------
+
+    funcao : função de leitura. Deve retornar uma matriz (numpy) ou um objeto que possa ser salvo com 'pickle';
+
+    nomeArquivo : nome do arquivo a ler;
+
+    argumentos : tupla com os demais argumentos de 'funcao'.
+
+
+    Retorno
+    -------
+
+    Objeto lido (compartilhado por todas as chamadas com os mesmos argumentos).
+
+    """
+    cache = cacheGlobal
+    caminho = os.path.abspath(nomeArquivo)
+
+    try:
+        estado = os.stat(caminho)
+    except:
+        raise NameError("Erro ao abrir arquivo: {}.".format(nomeArquivo))
+
+    chave = (funcao.__name__, caminho, argumentos)
+    assinatura = (estado.st_mtime_ns, estado.st_size)
+
+    with cache.trava:
+        entrada = cache.entradas.get(chave)
+        if entrada is not None and entrada[0]==assinatura:
+            cache.entradas.move_to_end(chave)
+            return entrada[1]
+
+    # Arquivo salvo no diretório do cache (por este ou outro processo).
+    arquivoCache = None
+    objeto = None
+    if cache.diretorio is not None:
+        # O nome do arquivo é formado pelo resumo da chave, comum a todas as versões do arquivo lido, e pelo 
+        # resumo da assinatura, que identifica a versão.
+        prefixo = hashlib.sha1(repr(chave).encode()).hexdigest()
+        resumo = "{}-{}".format(prefixo, hashlib.sha1(repr(assinatura).encode()).hexdigest()[:16])
+        arquivoCache = os.path.join(cache.diretorio, resumo)
+        if os.path.exists(arquivoCache + '.npy'):
+            objeto = np.load(arquivoCache + '.npy', mmap_mode='r')
+        elif os.path.exists(arquivoCache + '.pkl'):
+            with open(arquivoCache + '.pkl', 'rb') as f:
+                objeto = pickle.load(f)
+
+    if objeto is None:
+        objeto = funcao(nomeArquivo, *argumentos)
+        
+        if arquivoCache is not None:
+            extensao = '.npy' if isinstance(objeto, np.ndarray) else '.pkl'
+            temporario = "{}.{}.tmp".format(arquivoCache, uuid.uuid4().hex[:8])
+            with open(temporario, 'wb') as f:
+                if isinstance(objeto, np.ndarray):
+                    np.save(f, objeto)
+                else:
+                    pickle.dump(objeto, f)
+            os.replace(temporario, arquivoCache + extensao)
+
+            # Remove as versões anteriores do mesmo arquivo lido, para que o diretório do cache não cresça a cada 
+            # alteração. Versões ainda em uso (ex.: mapeadas por outro processo no Windows) são mantidas.
+            for nome in os.listdir(cache.diretorio):
+                if nome.startswith(prefixo + '-') and nome.endswith(('.npy', '.pkl')) and nome!=resumo + extensao:
+                    try:
+                        os.remove(os.path.join(cache.diretorio, nome))
+                    except OSError:
+                        pass
+
+    # Os objetos compartilhados são protegidos contra alterações (somente leitura).
+    if isinstance(objeto, tabelaPostos):
+        vetores = (objeto.nomes, objeto.anosIniciais, objeto.anosFinais)
+    elif isinstance(objeto, tabelaMLTS):
+        vetores = (objeto.valores,)
+    elif isinstance(objeto, np.ndarray):
+        vetores = (objeto,)
+    else:
+        vetores = None
+
+    if vetores is not None:
+        for vetor in vetores:
+            vetor.flags.writeable = False
+        tamanho = sum(vetor.nbytes for vetor in vetores)
+    else:
+        tamanho = len(pickle.dumps(objeto))
+
+    with cache.trava:
+        antiga = cache.entradas.pop(chave, None)
+        if antiga is not None:
+            cache.tamanhoAtual = cache.tamanhoAtual - antiga[2]
+        
+        cache.entradas[chave] = (assinatura, objeto, tamanho)
+        cache.tamanhoAtual = cache.tamanhoAtual + tamanho
+
+        # Descarta os objetos utilizados há mais tempo (o mais recente é sempre mantido).
+        while cache.tamanhoAtual>cache.tamanhoMaximo and len(cache.entradas)>1:
+            _, antiga = cache.entradas.popitem(last=False)
+            cache.tamanhoAtual = cache.tamanhoAtual - antiga[2]
+
+    return objeto
+
+def lePostosCache(nomeArquivo):
+    """
+    Idêntica a 'lePostos', mas utiliza o cache de arquivos (ver 'configuraCache'). O objeto retornado é 
+    compartilhado por todas as chamadas e é somente leitura: alterações geram erro ('ValueError').
+    """
+    return leComCache(lePostos, nomeArquivo, ())
+
+def leMLTSCache(nomeArquivo, numPostos=320):
+    """
+    Idêntica a 'leMLTS', mas utiliza o cache de arquivos (ver 'configuraCache'). O objeto retornado é 
+    compartilhado por todas as chamadas e é somente leitura: alterações geram erro ('ValueError').
+    """
+    return leComCache(leMLTS, nomeArquivo, (numPostos,))
+
+def leDadosVazoes(nomeArquivo, numPostos):
+    """
+    Retorna a matriz (meses x postos) de um arquivo binário de vazões. Função auxiliar de 'leVazoesCache'.
+    """
+    return leVazoes(nomeArquivo, numPostos=numPostos).dados
+
+def leVazoesCache(nomeArquivo, anoInicial=1931, numPostos=320, arquivoPostos=None):
+    """
+    Idêntica a 'leVazoes', mas utiliza o cache de arquivos (ver 'configuraCache').
+    
+    Cada chamada retorna um novo objeto 'historicoVazoes', mas a matriz 'dados' é compartilhada (somente leitura). 
+    'mudaVazao' e 'mudaVazoes' criam uma cópia própria dos dados antes da primeira alteração, sem afetar os 
+    demais históricos. Se 'arquivoPostos' for fornecido, os dados dos postos são lidos com 'lePostosCache' 
+    (também compartilhados e somente leitura).
+    """
+    # Determina o número de postos tal como em 'leVazoes'.
+    postos = None
+    if arquivoPostos is not None:
+        postos = lePostosCache(arquivoPostos)
+        numPostos = len(postos)
+    elif numPostos is None:
+        numPostos = detectaNumPostos(nomeArquivo)
+
+    vazoesHist = historicoVazoes(anoInicial, numPostos, leComCache(leDadosVazoes, nomeArquivo, (numPostos,)))
+    vazoesHist.postos = postos
+    vazoesHist.compartilhado = True
+
+    return vazoesHist
+
+
+# Registro das medições de desempenho (instrumentação opcional das rotinas de leitura e escrita).
+# eventos : lista de dicionários, um por fase executada, com as chaves 'funcao', 'fase', 'tempo' (segundos), 
+#   'bytes' (lidos ou escritos), 'registros' (processados), 'alocado' (pico de memória alocada na fase, em bytes, 
+#   somente se 'memoria' for True) e 'thread';
+# callbacks : lista de rotinas chamadas com cada evento, no momento em que é registrado;
+# memoria : se True, mede a memória alocada em cada fase com o 'tracemalloc' (mais lento). Fases executadas 
+#   simultaneamente por várias 'threads' ou que chamam outras rotinas instrumentadas podem ter a memória subestimada.
+# O registro é ativado com 'with registroDesempenho() as registro:' e fica ativo apenas no contexto em que o bloco 
+# 'with' é executado ('contextvars'): tarefas 'asyncio' simultâneas, cada uma com o seu registro, não interferem 
+# entre si. As 'threads' criadas pelas rotinas do módulo recebem uma cópia do contexto de quem as chamou. Fora do 
+# bloco 'with', as rotinas apenas verificam que não há registro ativo ('registroAtivo.get()' igual a None).
+class registroDesempenho:
+    def __init__(self, callbacks=None, memoria=False):
+        self.eventos = []
+        self.callbacks = [] if callbacks is None else list(callbacks)
+        self.memoria = memoria
+        self.marcador = None
+        self.iniciouTracemalloc = False
+        self.trava = threading.Lock()
+
+    def __enter__(self):
+        if self.memoria and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.iniciouTracemalloc = True
+
+        # Registros podem ser aninhados: o anterior volta a ser o ativo ao final do bloco.
+        self.marcador = registroAtivo.set(self)
+        return self
+
+    def __exit__(self, tipo, valor, rastro):
+        registroAtivo.reset(self.marcador)
+        self.marcador = None
+
+        if self.iniciouTracemalloc:
+            tracemalloc.stop()
+            self.iniciouTracemalloc = False
+
+        return False
+
+    def inicia(self):
+        """
+        Marca o início de uma fase. Retorna o instante e a memória alocada, a serem passados para 'registra'.
+        """
+        if self.memoria and tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+            return (time.perf_counter(), tracemalloc.get_traced_memory()[0])
+        
+        return (time.perf_counter(), None)
+
+    def registra(self, funcao, fase, inicio, numBytes=0, numRegistros=0):
+        """
+        Registra o término de uma fase iniciada com 'inicia' e chama os 'callbacks'.
+        """
+        tempo = time.perf_counter() - inicio[0]
+        
+        alocado = None
+        if inicio[1] is not None and tracemalloc.is_tracing():
+            alocado = max(tracemalloc.get_traced_memory()[1] - inicio[1], 0)
+
+        evento = {'funcao': funcao, 'fase': fase, 'tempo': tempo, 'bytes': int(numBytes), 
+                  'registros': int(numRegistros), 'alocado': alocado, 'thread': threading.get_ident()}
+
+        with self.trava:
+            self.eventos.append(evento)
+        
+        for callback in self.callbacks:
+            callback(evento)
+
+    def comoDicionario(self):
+        """
+        Retorna os eventos e um resumo no formato {função; {fase; totais}}, com o número de chamadas, o tempo, 
+        os bytes, os registros e o maior pico de memória alocada de cada fase.
+        """
+        with self.trava:
+            eventos = list(self.eventos)
+
+        resumo = {}
+        for evento in eventos:
+            total = resumo.setdefault(evento['funcao'], {}).setdefault(evento['fase'], 
+                    {'chamadas': 0, 'tempo': 0.0, 'bytes': 0, 'registros': 0, 'alocado': None})
+            total['chamadas'] = total['chamadas'] + 1
+            total['tempo'] = total['tempo'] + evento['tempo']
+            total['bytes'] = total['bytes'] + evento['bytes']
+            total['registros'] = total['registros'] + evento['registros']
+            if evento['alocado'] is not None:
+                total['alocado'] = max(total['alocado'] or 0, evento['alocado'])
+
+        return {'eventos': eventos, 'resumo': resumo}
+
+    def comoJsonLinhas(self):
+        """
+        Retorna os eventos no formato 'JSON lines' (um objeto JSON por linha).
+        """
+        with self.trava:
+            eventos = list(self.eventos)
+
+        return ''.join(json.dumps(evento) + '\n' for evento in eventos)
+
+    def salvaJsonLinhas(self, nomeArquivo, anexar=True):
+        """
+        Salva os eventos no formato 'JSON lines'. Se 'anexar' for True, os eventos são incluídos no final do arquivo.
+        """
+        try:
+            with open(nomeArquivo, 'a' if anexar else 'w', encoding='utf-8') as f:
+                f.write(self.comoJsonLinhas())
+        except:
+            raise NameError("Erro ao salvar o registro de desempenho: {}".format(nomeArquivo))
+
+# Registro de desempenho ativo no contexto atual (ver 'registroDesempenho'). None quando a instrumentação está 
+# desativada.
+registroAtivo = contextvars.ContextVar('registroAtivo', default=None)
+
+
+# Limites das rotinas assíncronas ('leVazoesAsync', 'salvaArquivoAsync' e 'lePostosAsync').
+# maxConcorrencia : número máximo de leituras/escritas simultâneas. As demais aguardam, sem bloquear o 'event loop';
+# executor : 'ThreadPoolExecutor' onde as leituras/escritas são executadas (criado na primeira utilização);
+# tamanhoBloco : número de bytes lidos/escritos de cada vez. Entre os blocos, as rotinas verificam se foram 
+#   canceladas e liberam o GIL para as demais 'threads' (inclusive a do 'event loop');
+# semaforos : semáforos ('asyncio.Semaphore') que limitam a concorrência, um por 'event loop';
+# travaFormatacao : a formatação em texto depende do GIL e não ganha com a execução simultânea. Assim, apenas uma 
+#   'thread' formata texto de cada vez, enquanto as leituras/escritas continuam simultâneas. Isso evita que várias 
+#   'threads' disputem o GIL com o 'event loop'.
+class limitesAsync:
+    def __init__(self, maxConcorrencia=4, tamanhoBloco=2**16):
+        self.maxConcorrencia = maxConcorrencia
+        self.tamanhoBloco = tamanhoBloco
+        self.executor = None
+        self.semaforos = weakref.WeakKeyDictionary()
+        self.trava = threading.Lock()
+        self.travaFormatacao = threading.Lock()
+
+asyncGlobal = limitesAsync()
+
+def configuraAsync(maxConcorrencia=4, tamanhoBloco=2**16):
+    """
+    Configura os limites das rotinas assíncronas ('leVazoesAsync', 'salvaArquivoAsync' e 'lePostosAsync').
+
+    Argumentos
+    ----------
+
+    maxConcorrencia : (Opcional) número máximo de leituras/escritas simultâneas. Default: 4.
+
+    tamanhoBloco : (Opcional) número de bytes lidos/escritos de cada vez, entre as verificações de cancelamento. 
+        Blocos menores reduzem o tempo de resposta do 'event loop' durante as escritas em texto. Default: 64 kB.
+
+
+    Retorno
+    -------
+
+    Nenhum.
+
+    """
+    global asyncGlobal
+    
+    anterior = asyncGlobal
+    asyncGlobal = limitesAsync(maxConcorrencia, tamanhoBloco)
+
+    # As operações em andamento terminam normalmente no executor anterior.
+    if anterior.executor is not None:
+        anterior.executor.shutdown(wait=False)
+
+async def executaAsync(funcao, *argumentos):
+    """
+    Executa 'funcao(*argumentos, cancelado)' no executor das rotinas assíncronas, respeitando o número máximo de 
+    operações simultâneas. 'cancelado' é um 'threading.Event' sinalizado quando a tarefa é cancelada, que deve ser 
+    verificado pela função entre as etapas da leitura/escrita. Função auxiliar das rotinas assíncronas.
+
+    """
+    # O 'asyncio' somente é importado quando necessário, pois sua importação é lenta.
+    import asyncio
+
+    limites = asyncGlobal
+    loop = asyncio.get_running_loop()
+    
+    with limites.trava:
+        if limites.executor is None:
+            limites.executor = ThreadPoolExecutor(max_workers=limites.maxConcorrencia, thread_name_prefix='pyVazEdit')
+        semaforo = limites.semaforos.get(loop)
+        if semaforo is None:
+            semaforo = limites.semaforos[loop] = asyncio.Semaphore(limites.maxConcorrencia)
+
+    cancelado = threading.Event()
+
+    async with semaforo:
+        # A função é executada em uma cópia do contexto da tarefa (ver 'registroDesempenho').
+        futuro = limites.executor.submit(contextvars.copy_context().run, funcao, *argumentos, cancelado)
+        try:
+            return await asyncio.wrap_future(futuro)
+        except asyncio.CancelledError:
+            # Operações já iniciadas são interrompidas no próximo bloco. O semáforo somente é liberado após o 
+            # término da 'thread', mantendo o limite de operações simultâneas.
+            cancelado.set()
+            if not futuro.cancel():
+                await asyncio.wait([asyncio.wrap_future(futuro)])
+            raise
+
+def leBlocosVazoes(nomeArquivo, numPostos, cancelado):
+    """
+    Lê um arquivo binário de vazões em blocos, interrompendo a leitura se 'cancelado' for sinalizado. 
+    Função auxiliar de 'leVazoesAsync'.
+
+    Retorna a matriz (meses x postos) ou None, se a leitura for cancelada.
+    """
+    desempenho = registroAtivo.get()
+    if desempenho is not None:
+        marca = desempenho.inicia()
+
+    try:
+        with open(nomeArquivo, 'rb') as f:
+            tamanho = os.fstat(f.fileno()).st_size
+            if (tamanho % tipoVazao.itemsize != 0):
+                raise ValueError("Arquivo incompatível com {} postos.".format(numPostos))
+            verificaNumPostos(tamanho // tipoVazao.itemsize, numPostos, nomeArquivo)
+
+            dados = np.empty(tamanho // tipoVazao.itemsize, dtype=tipoVazao)
+            destino = memoryview(dados).cast('B')
+            pos = 0
+            while pos < tamanho:
+                if cancelado.is_set():
+                    return None
+                lidos = f.readinto(destino[pos:pos + asyncGlobal.tamanhoBloco])
+                if lidos==0:
+                    raise ValueError("Fim inesperado do arquivo.")
+                pos = pos + lidos
+    except NameError:
+        raise
+    except ValueError:
+        raise NameError("Arquivo binário de vazões incompatível com {} postos:{}.".format(numPostos, nomeArquivo))
+    except:
+        raise NameError("Erro ao abrir arquivo binário de vazões:{}.".format(nomeArquivo))
+
+    if desempenho is not None:
+        desempenho.registra('leVazoesAsync', 'leitura', marca, numBytes=dados.nbytes, numRegistros=dados.size // numPostos)
+
+    return dados.reshape(-1, numPostos)
+
+def escreveBlocos(nomeArquivo, vazoesHist, tipoArquivo, cancelado):
+    """
+    Escreve um histórico de vazões em um arquivo temporário, em blocos, e substitui 'nomeArquivo' somente após a 
+    escrita completa (modo atômico de 'salvaArquivo'). Se 'cancelado' for sinalizado, o arquivo temporário é 
+    removido e 'nomeArquivo' não é alterado. Função auxiliar de 'salvaArquivoAsync'.
+
+    Retorna True se o arquivo foi salvo ou False, se a escrita for cancelada.
+    """
+    # Histórico mapeado no próprio arquivo: ver 'salvaArquivo'.
+    if mapeadoEm(vazoesHist, nomeArquivo):
+        if tipoArquivo=='binario' and vazoesHist.dados.mode=='r+':
+            vazoesHist.dados.flush()
+            return True
+        vazoesHist.dados = np.array(vazoesHist.dados)
+
+    nr = len(vazoesHist.dados)
+    temporario = "{}.{}.tmp".format(nomeArquivo, uuid.uuid4().hex[:8])
+
+    desempenho = registroAtivo.get()
+    if desempenho is not None:
+        marca = desempenho.inicia()
+
+    try:
+        if (tipoArquivo=='binario'):
+            dados = np.ascontiguousarray(vazoesHist.dados[:nr, :vazoesHist.numPostos], dtype=tipoVazao)
+            origem = memoryview(dados).cast('B')
+            with open(temporario, 'wb') as f:
+                for pos in range(0, len(origem), asyncGlobal.tamanhoBloco):
+                    if cancelado.is_set():
+                        break
+                    f.write(origem[pos:pos + asyncGlobal.tamanhoBloco])
+        
+        elif (tipoArquivo=='vazEdit' or tipoArquivo=='csv'):
+            # O texto é formatado e escrito em grupos de postos, de modo que o GIL seja liberado entre os grupos.
+            sep, adj = (',', [0,0,0]) if tipoArquivo=='csv' else ('', [3,6,5])
+            postos = postosComValores(vazoesHist.dados[:nr, :vazoesHist.numPostos])
+            # Cada linha (um ano de um posto) tem, no máximo, 83 caracteres no formato 'vazEdit'.
+            postosPorGrupo = max(asyncGlobal.tamanhoBloco // (nr // 12 * 83 + 1), 1)
+            with open(temporario, 'w') as f:
+                for i in range(0, len(postos), postosPorGrupo):
+                    if cancelado.is_set():
+                        break
+                    with asyncGlobal.travaFormatacao:
+                        texto = formataTexto(vazoesHist, nr, sep, adj, postos[i:i + postosPorGrupo])
+                    f.write(texto)
+        
+        else:
+            # A compactação ('zlib') libera o GIL durante a escrita.
+            escreveArquivo(temporario, vazoesHist, tipoArquivo, nr)
+
+        if cancelado.is_set():
+            os.remove(temporario)
+            return False
+        
+        substituiArquivo(temporario, nomeArquivo)
+    except:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise NameError("Erro ao salvar arquivo do tipo {} : {}".format(tipoArquivo, nomeArquivo))
+
+    if desempenho is not None:
+        desempenho.registra('salvaArquivoAsync', 'escrita', marca, numBytes=os.path.getsize(nomeArquivo), numRegistros=nr)
+
+    return True
+
+async def lePostosAsync(nomeArquivo):
+    """
+    Versão assíncrona de 'lePostos', executada fora do 'event loop' (ver 'configuraAsync').
+
+    Argumentos
+    ----------
+
+    nomeArquivo : nome do arquivo binario de postos no formato do ONS.
+    
+    Retorno
+    -------
+
+    Objeto 'tabelaPostos', idêntico ao retornado por 'lePostos'.
+
+    """
+    return await executaAsync(lambda nome, cancelado: lePostos(nome), nomeArquivo)
+
+async def leVazoesAsync(nomeArquivo, anoInicial=1931, numPostos=320, arquivoPostos=None):
+    """
+    Versão assíncrona de 'leVazoes'. O arquivo é lido em blocos fora do 'event loop' e a leitura é interrompida 
+    se a tarefa for cancelada. O número de leituras simultâneas é limitado (ver 'configuraAsync').
+
+    Argumentos
+    ----------
+
+    nomeArquivo : nome do arquivo binário de vazões no formato CEPEL/ONS;
+
+    anoInicial : (Opcional) ano inicial do histórico de vazões. Default: 1931.
+
+    numeroPostos : (Opcional) número de postos contidos no histórico de vazões. Default: 320.
+        Se None, o número de postos será determinado automaticamente (ver 'detectaNumPostos').
+
+    arquivoPostos : (Opcional) nome do arquivo binário de postos ('postos.dat') correspondente. Se fornecido, 
+        o número de postos será obtido deste arquivo e os dados dos postos serão atribuídos a 'historicoVazoes.postos'.
+
+    
+    Retorno
+    -------
+
+    Objeto tipo 'historicoVazoes', idêntico ao retornado por 'leVazoes'.
+
+    """
+    postos = None
+    if arquivoPostos is not None:
+        postos = await lePostosAsync(arquivoPostos)
+        numPostos = len(postos)
+    elif numPostos is None:
+        numPostos = await executaAsync(lambda nome, cancelado: detectaNumPostos(nome), nomeArquivo)
+
+    dados = await executaAsync(leBlocosVazoes, nomeArquivo, numPostos)
+
+    vazoesHist = historicoVazoes(anoInicial, numPostos, dados)
+    vazoesHist.postos = postos
+
+    return vazoesHist
+
+async def salvaArquivoAsync(nomeArquivo, vazoesHist, tipoArquivo='binario'):
+    """
+    Versão assíncrona de 'salvaArquivo'. Os dados são formatados e escritos em blocos fora do 'event loop', 
+    sempre no modo atômico: se a tarefa for cancelada, o arquivo existente não é alterado. O número de escritas 
+    simultâneas é limitado (ver 'configuraAsync').
+
+    Argumentos
+    ----------
+    
+    nomeArquivo : nome do arquivo a salvar;
+
+    vazoesHist: objeto do tipo 'historicoVazoes' com os dados a serem salvos. Não deve ser alterado até o 
+        término da escrita;
+
+    tipoArquivo : (Opcional) 'binario', 'vazEdit', 'csv' ou 'npz' (ver 'salvaArquivo'). Default:'binario'.
+
+
+    Retorno
+    -------
+
+    Nenhum.
+
+    """
+    if tipoArquivo not in ('binario', 'vazEdit', 'csv', 'npz'):
+        raise NameError("Tipo de arquivo a salvar inválido!\nUtilize 'binario', 'vazEdit', 'csv' ou 'npz'.")
+
+    await executaAsync(escreveBlocos, nomeArquivo, vazoesHist, tipoArquivo)
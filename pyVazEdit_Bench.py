@@ -0,0 +1,323 @@
+# -*- coding: utf-8 -*-
+
+"""
+******************************************************************************
+Medições de desempenho do 'pyVazEdit'.
+
+Mede o tempo de importação do módulo e o desempenho (tempo, vazão em MB/s e valores/s e pico de memória) das
+rotinas de leitura e escrita, utilizando os arquivos da pasta 'tests' e arquivos sintéticos (600 postos e
+históricos com vários séculos). Os resultados podem ser salvos como base (JSON) e comparados em execuções
+futuras, indicando as regressões.
+
+Utilização:
+
+    python pyVazEdit_Bench.py                   # mede e compara com a base, se existir
+    python pyVazEdit_Bench.py --salvar-base     # mede e salva os resultados como nova base
+    python pyVazEdit_Bench.py --filtro leVazoes # mede apenas os casos cujo nome contém 'leVazoes'
+    python pyVazEdit_Bench.py --sem-memoria     # não mede o pico de memória (execução mais rápida)
+
+Autor   : Nelson Rossi Bittencourt
+Versão  : 0.111
+Licença : MIT
+Dependências: pyVazEdit, numpy e openpyxl (opcional, para o caso 'lerVazoesExcel')
+******************************************************************************
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+
+import pyVazEdit as pVE
+
+# Tempo máximo (em segundos) para 'import pyVazEdit' em um processo novo.
+limiteImportacao = 0.5
+
+# Diretório deste arquivo, da pasta com os arquivos de teste e arquivo padrão da base de comparação.
+dirBench = os.path.dirname(os.path.abspath(__file__))
+dirTestes = os.path.join(dirBench, 'tests')
+arquivoBase = os.path.join(dirBench, 'pyVazEdit_Bench.json')
+
+# Aumento relativo (tempo ou pico de memória) acima do qual um caso é considerado uma regressão.
+toleranciaRegressao = 0.25
+
+
+# Classe que conterá um caso a ser medido.
+# nome : identificação do caso (também utilizada como chave na base de comparação);
+# funcao : rotina a ser medida. Recebe os argumentos retornados por 'preparo';
+# preparo : (opcional) rotina executada antes de cada medição, fora da contagem do tempo (ex.: cópia dos dados a
+#   alterar). Retorna a tupla de argumentos de 'funcao';
+# numBytes e numValores : quantidades processadas por execução, para o cálculo de MB/s e valores/s. Podem ser
+#   rotinas, avaliadas após a primeira execução (ex.: tamanho de um arquivo salvo).
+class casoBench:
+    def __init__(self, nome, funcao, preparo=None, numBytes=0, numValores=0):
+        self.nome = nome
+        self.funcao = funcao
+        self.preparo = preparo
+        self.numBytes = numBytes
+        self.numValores = numValores
+
+
+def medeImportacao(repeticoes=5):
+    """
+    Mede o tempo de importação do 'pyVazEdit' em processos novos, com o auxílio da opção '-X importtime'
+    do Python. Retorna o menor tempo (em segundos) entre as repetições e os módulos carregados.
+
+    """
+    tempos = []
+    for _ in range(repeticoes):
+        saida = subprocess.run([sys.executable, '-X', 'importtime', '-c',
+                                'import sys, pyVazEdit; print(" ".join(sys.modules))'],
+                                capture_output=True, text=True, check=True,
+                                cwd=dirBench)
+
+        # A linha do 'pyVazEdit' contém o tempo acumulado (em microssegundos) da importação.
+        for linha in saida.stderr.splitlines():
+            campos = linha.split('|')
+            if len(campos)==3 and campos[2].strip()=='pyVazEdit':
+                tempos.append(int(campos[1]) / 1e6)
+
+        modulos = saida.stdout.split()
+
+    return min(tempos), modulos
+
+
+def criaArquivoSintetico(nomeArquivo, numAnos, numPostos, semente=0):
+    """
+    Cria um arquivo binário de vazões com valores aleatórios (reprodutíveis) para as medições.
+
+    Argumentos
+    ----------
+
+    nomeArquivo : nome do arquivo a criar;
+
+    numAnos : número de anos do histórico;
+
+    numPostos : número de postos do histórico;
+
+    semente : (Opcional) semente do gerador de números aleatórios. Default: 0.
+
+
+    Retorno
+    -------
+
+    Número de valores do arquivo.
+
+    """
+    gerador = np.random.default_rng(semente)
+    dados = gerador.integers(0, 20000, size=(12*numAnos, numPostos), dtype=np.int32)
+    dados.astype(pVE.tipoVazao).tofile(nomeArquivo)
+
+    return dados.size
+
+
+def montaCasos(diretorio):
+    """
+    Monta a lista de casos a medir, criando os arquivos sintéticos em 'diretorio'.
+
+    Argumentos
+    ----------
+
+    diretorio : diretório temporário para os arquivos sintéticos e arquivos salvos durante as medições.
+
+
+    Retorno
+    -------
+
+    Lista de objetos 'casoBench'.
+
+    """
+    casos = []
+
+    arqPostos = os.path.join(dirTestes, 'POSTOS.DAT')
+    arqMLTS = os.path.join(dirTestes, 'MLT.DAT')
+    arqExcel = os.path.join(dirTestes, 'pyVazEdit_Excel.xlsx')
+
+    # Metadados dos postos e MLTs (versões atuais e descontinuadas).
+    tamPostos = os.path.getsize(arqPostos)
+    tamMLTS = os.path.getsize(arqMLTS)
+    casos.append(casoBench('lePostos', lambda: pVE.lePostos(arqPostos), numBytes=tamPostos, numValores=tamPostos//20))
+    casos.append(casoBench('lePostos_Old', lambda: pVE.lePostos_Old(arqPostos), numBytes=tamPostos,
+                           numValores=tamPostos//20))
+    casos.append(casoBench('leMLTS', lambda: pVE.leMLTS(arqMLTS), numBytes=tamMLTS, numValores=tamMLTS//4))
+    casos.append(casoBench('leMLTS_Old', lambda: pVE.leMLTS_Old(arqMLTS), numBytes=tamMLTS, numValores=tamMLTS//4))
+
+    # Históricos de vazões: arquivo do ONS (320 postos), sintético com 600 postos e sintético com vários séculos.
+    historicos = [('ons', os.path.join(dirTestes, 'vazoes_original_ONS.dat'), 1931, 320)]
+
+    arq600 = os.path.join(diretorio, 'vazoes_600.dat')
+    criaArquivoSintetico(arq600, numAnos=100, numPostos=600, semente=600)
+    historicos.append(('600postos', arq600, 1931, 600))
+
+    arqSeculos = os.path.join(diretorio, 'vazoes_seculos.dat')
+    criaArquivoSintetico(arqSeculos, numAnos=300, numPostos=320, semente=300)
+    historicos.append(('3seculos', arqSeculos, 1721, 320))
+
+    for sufixo, arquivo, anoInicial, numPostos in historicos:
+        tamanho = os.path.getsize(arquivo)
+        numValores = tamanho // pVE.tipoVazao.itemsize
+
+        casos.append(casoBench('leVazoes[{}]'.format(sufixo),
+                               lambda a=arquivo, i=anoInicial, n=numPostos: pVE.leVazoes(a, i, n),
+                               numBytes=tamanho, numValores=numValores))
+
+        # A versão descontinuada é medida apenas com o arquivo do ONS.
+        if sufixo=='ons':
+            casos.append(casoBench('leVazoes_Old[{}]'.format(sufixo),
+                                   lambda a=arquivo, i=anoInicial, n=numPostos: pVE.leVazoes_Old(a, i, n),
+                                   numBytes=tamanho, numValores=numValores))
+
+        vazoesHist = pVE.leVazoes(arquivo, anoInicial, numPostos)
+
+        # Escrita em todos os formatos de 'salvaArquivo'. O número de bytes é o tamanho do arquivo salvo.
+        for tipoArquivo in ('binario', 'vazEdit', 'csv', 'npz'):
+            arqSaida = os.path.join(diretorio, 'saida_{}.{}'.format(sufixo, tipoArquivo))
+            casos.append(casoBench('salvaArquivo[{},{}]'.format(tipoArquivo, sufixo),
+                                   lambda a=arqSaida, h=vazoesHist, t=tipoArquivo: pVE.salvaArquivo(a, h, t),
+                                   numBytes=lambda a=arqSaida: os.path.getsize(a), numValores=numValores))
+
+        # Alterações em lote: um valor por mês do histórico, em um posto.
+        alteracoes = [[6, mes, ano, mes+ano] for ano in range(vazoesHist.anoInicial, vazoesHist.anoFinal+1)
+                                             for mes in range(1, 13)]
+        copia = lambda h=vazoesHist: (pVE.historicoVazoes(h.anoInicial, h.numPostos, h.dados.copy()),)
+
+        casos.append(casoBench('mudaVazao[{}]'.format(sufixo),
+                               lambda h, a=alteracoes: [pVE.mudaVazao(h, *alteracao) for alteracao in a],
+                               preparo=copia, numValores=len(alteracoes)))
+        casos.append(casoBench('mudaVazoes[{}]'.format(sufixo),
+                               lambda h, a=alteracoes: pVE.mudaVazoes(h, a),
+                               preparo=copia, numValores=len(alteracoes)))
+
+    # Leitura do Excel (somente se o 'openpyxl' estiver instalado).
+    try:
+        import openpyxl
+        casos.append(casoBench('lerVazoesExcel', lambda: pVE.lerVazoesExcel(arqExcel, 3, 2, 13, 14),
+                               numBytes=os.path.getsize(arqExcel), numValores=10*12))
+    except ImportError:
+        print("'openpyxl' não instalado: caso 'lerVazoesExcel' ignorado.")
+
+    return casos
+
+
+def medeCaso(caso, repeticoes=5, medeMemoria=True):
+    """
+    Mede um caso, retornando o menor tempo entre as repetições (em segundos), o pico de memória alocada (em bytes,
+    obtido com o 'tracemalloc') e as quantidades processadas (bytes e valores).
+
+    O pico de memória é medido em uma execução separada, pois o 'tracemalloc' torna a execução mais lenta (muito
+    nas escritas em texto). Se 'medeMemoria' for False, essa execução não é feita e o pico retornado é zero.
+
+    """
+    tempos = []
+    for _ in range(repeticoes):
+        argumentos = caso.preparo() if caso.preparo else ()
+        inicio = time.perf_counter()
+        caso.funcao(*argumentos)
+        tempos.append(time.perf_counter() - inicio)
+
+    pico = 0
+    if medeMemoria:
+        argumentos = caso.preparo() if caso.preparo else ()
+        tracemalloc.start()
+        caso.funcao(*argumentos)
+        pico = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    numBytes = caso.numBytes() if callable(caso.numBytes) else caso.numBytes
+    numValores = caso.numValores() if callable(caso.numValores) else caso.numValores
+
+    return {'tempo': min(tempos), 'pico': pico, 'bytes': numBytes, 'valores': numValores}
+
+
+def comparaBase(resultados, base, tolerancia=toleranciaRegressao):
+    """
+    Compara os resultados com a base, retornando a lista de regressões (tempo ou pico de memória acima da base
+    em mais de 'tolerancia', em termos relativos). Casos ausentes da base são ignorados.
+
+    """
+    regressoes = []
+    for nome, resultado in resultados.items():
+        if nome not in base:
+            continue
+        for medida in ('tempo', 'pico'):
+            if base[nome][medida] > 0 and resultado[medida] > 0 and \
+               resultado[medida] > base[nome][medida] * (1 + tolerancia):
+                regressoes.append("{}: {} {:.3g} -> {:.3g} (+{:.0%})".format(nome, medida, base[nome][medida],
+                                  resultado[medida], resultado[medida] / base[nome][medida] - 1))
+
+    return regressoes
+
+
+def imprimeResultados(resultados, base):
+    """
+    Imprime a tabela de resultados, com a variação de tempo em relação à base (se existir).
+
+    """
+    print("{:32s} {:>10s} {:>9s} {:>12s} {:>10s} {:>9s}".format('caso', 'tempo(ms)', 'MB/s', 'valores/s',
+                                                                 'pico(MB)', 'vs base'))
+    for nome, r in resultados.items():
+        mbs = r['bytes'] / 2**20 / r['tempo'] if r['bytes'] else float('nan')
+        vps = r['valores'] / r['tempo'] if r['valores'] else float('nan')
+        variacao = "{:+.0%}".format(r['tempo'] / base[nome]['tempo'] - 1) if nome in base else '-'
+        print("{:32s} {:10.3f} {:9.1f} {:12.3g} {:10.2f} {:>9s}".format(nome, r['tempo']*1e3, mbs, vps,
+                                                                       r['pico'] / 2**20, variacao))
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description="Medições de desempenho do 'pyVazEdit'.")
+    parser.add_argument('--repeticoes', type=int, default=5, help="Repetições por caso (menor tempo). Default: 5.")
+    parser.add_argument('--filtro', default='', help="Mede apenas os casos cujo nome contém o texto informado.")
+    parser.add_argument('--base', default=arquivoBase, help="Arquivo JSON da base de comparação.")
+    parser.add_argument('--sem-memoria', action='store_true', help="Não mede o pico de memória (mais rápido).")
+    parser.add_argument('--salvar-base', action='store_true', help="Salva os resultados como nova base.")
+    parser.add_argument('--tolerancia', type=float, default=toleranciaRegressao,
+                        help="Aumento relativo considerado regressão. Default: {}.".format(toleranciaRegressao))
+    args = parser.parse_args()
+
+    falhas = []
+
+    # Tempo de importação do 'pyVazEdit'. Dependências opcionais (ex.: 'openpyxl') não devem ser importadas.
+    tempo, modulos = medeImportacao()
+    print("import pyVazEdit: {:.3f} s (limite: {:.3f} s)\n".format(tempo, limiteImportacao))
+
+    if tempo > limiteImportacao:
+        falhas.append("Importação acima do limite.")
+    if 'openpyxl' in modulos:
+        falhas.append("O 'openpyxl' não deve ser importado com o 'pyVazEdit'.")
+
+    # Base de comparação (se existir).
+    base = {}
+    if os.path.exists(args.base) and not args.salvar_base:
+        with open(args.base, encoding='utf-8') as f:
+            base = json.load(f)['casos']
+
+    # Medições. Os arquivos sintéticos e salvos são criados em um diretório temporário.
+    resultados = {}
+    with tempfile.TemporaryDirectory() as diretorio:
+        for caso in montaCasos(diretorio):
+            if args.filtro in caso.nome:
+                resultados[caso.nome] = medeCaso(caso, args.repeticoes, not args.sem_memoria)
+
+    imprimeResultados(resultados, base)
+
+    if args.salvar_base:
+        with open(args.base, 'w', encoding='utf-8') as f:
+            json.dump({'python': platform.python_version(), 'numpy': np.__version__, 'maquina': platform.machine(),
+                       'casos': resultados}, f, indent=1)
+        print("\nBase salva em: {}".format(args.base))
+    else:
+        falhas.extend(comparaBase(resultados, base, args.tolerancia))
+
+    if falhas:
+        print()
+    for falha in falhas:
+        print(falha)
+
+    sys.exit(1 if falhas else 0)
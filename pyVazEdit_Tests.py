@@ -48,6 +48,9 @@ if __name__ == '__main__':
     # vazaoCamargosDez1931 = meuHistVazoes.valores[1][11]
     # vazaoCamargosJan1932 = meuHistVazoes.valores[1][12]
     # vazaoCamargosJanPosto320 = meuHistVazoes.valores[320][0]
+    # Ou, sem calcular posições, com a rotina 'consultaVazoes' (a consulta por nome exige que o histórico seja
+    # lido com o argumento 'arquivoPostos'):
+    # vazoesCamargos = pVE.consultaVazoes(meuHistVazoes, postos=['CAMARGOS'], inicio=(1,1931), fim=(12,1950))[1]
         
     # Exemplo 1: Alterando o valore de Jan/1931 do posto Camargos.
     # Utilizando a rotina 'mudaVazao' a posição sequencial é calculada automaticamente.
@@ -56,9 +59,10 @@ if __name__ == '__main__':
     
 
     # Exemplo 2: Alterando todos os dados passados de Furnas (posto número 6) para valores de teste.
-    for ano in range(meuHistVazoes.anoInicial, meuHistVazoes.anoFinal+1):
-        for mes in range(1,13):
-            pVE.mudaVazao(meuHistVazoes,6,mes, ano, mes+ano)
+    # A rotina 'mudaVazoes' altera vários valores de uma só vez. Cada alteração é uma lista [posto, mes, ano, valor].
+    alteracoes = [[6, mes, ano, mes+ano] for ano in range(meuHistVazoes.anoInicial, meuHistVazoes.anoFinal+1) 
+                                         for mes in range(1,13)]
+    pVE.mudaVazoes(meuHistVazoes, alteracoes)
 
     # Salva arquivos de vazão com valores alterados.
     # Utilize o argumento 'tipo' para especificar o tipo de arquivo a ser salvo.
@@ -71,10 +75,8 @@ if __name__ == '__main__':
     # Exemplo 3: Lendo dados do Excel para alterar o histórico de vazões.
     vazoesNovasExcel = pVE.lerVazoesExcel('tests/pyVazEdit_Excel.xlsx',3,2,13,14)
        
-    for key in vazoesNovasExcel:
-        tmpList = vazoesNovasExcel[key]
-        for sl in tmpList:
-            pVE.mudaVazao(meuHistVazoes, key, sl[0], sl[1], sl[2]) 
+    # O dicionário retornado por 'lerVazoesExcel' pode ser utilizado diretamente pela rotina 'mudaVazoes'.
+    pVE.mudaVazoes(meuHistVazoes, vazoesNovasExcel)
 
     pVE.salvaArquivo('tests/vazoes_ex_03.txt', meuHistVazoes,'vazEdit') 
 
@@ -83,9 +85,10 @@ if __name__ == '__main__':
     # de Camargos (MLT Anual) lança esse valor para 2022.
     meuHistVazoes = pVE.leVazoes(nomeArquivo='tests/vazoes_original_ONS.dat')
 
-    aux = meuHistVazoes.valores[1]
-    denominador = sum(x > 0 for x in aux)
-    mltCamargos = int(sum(aux)/denominador)
+    # A rotina 'calculaEstatisticas' calcula MLTs, desvios, mínimos, máximos e percentis de todos os postos 
+    # de uma só vez, desconsiderando os meses sem dados (vazão igual a zero).
+    minhasEstatisticas = pVE.calculaEstatisticas(meuHistVazoes)
+    mltCamargos = int(minhasEstatisticas.mltAnual[0])
 
     for m in range(1,13):
         pVE.mudaVazao(meuHistVazoes,1,m,2022,mltCamargos)